@@ -0,0 +1,54 @@
+"""
+Graph setup cost per chat message: rebuilding and compiling the LangGraph with a fresh
+MemorySaver on every message (the previous behaviour) versus the graph compiled once.
+
+A fake chat model answers instantly, so the difference is the per-message framework overhead.
+
+    cd backend && python -m benchmarks.chat_graph_setup --messages 200
+"""
+import argparse
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import HumanMessage, SystemMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from core.handlers.chat import build_chat_graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200)
+    args = parser.parse_args()
+
+    llm = FakeListChatModel(responses=["ok"])
+
+    def chatbot(state):
+        return {"messages": [llm.invoke([SystemMessage(content=state["system_prompt"])] + state["messages"])]}
+
+    def send(graph, i):
+        graph.invoke({"messages": [HumanMessage(content=f"question {i}")], "system_prompt": "system"},
+                     config={"configurable": {"thread_id": "bench"}})
+
+    started = time.perf_counter()
+    setup = 0.0
+    for i in range(args.messages):
+        setup_started = time.perf_counter()
+        graph = build_chat_graph(chatbot, checkpointer=MemorySaver())
+        setup += time.perf_counter() - setup_started
+        send(graph, i)
+    rebuilt_total = time.perf_counter() - started
+
+    graph = build_chat_graph(chatbot)
+    started = time.perf_counter()
+    for i in range(args.messages):
+        send(graph, i)
+    compiled_once_total = time.perf_counter() - started
+
+    print(f"graph setup per message (rebuilt):   {setup / args.messages * 1000:.3f} ms")
+    print(f"total per message (rebuilt):         {rebuilt_total / args.messages * 1000:.3f} ms")
+    print(f"total per message (compiled once):   {compiled_once_total / args.messages * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+End-to-end chat throughput of one worker against the mock LLM provider.
+
+Every simulated candidate sends its messages one after another, all candidates at once, through
+ChatHandler.process_chat (or stream_chat with --stream). Requires LLM_PROVIDER = mock in the CHAT
+section; use HISTORY_BACKEND = memory to leave MongoDB out of the measurement. Latency, chunk
+timing and error injection come from the MOCK_LLM section.
+
+    cd backend && python -m benchmarks.chat_throughput --candidates 100 --messages 5
+"""
+import argparse
+import asyncio
+import time
+
+from constants.configurations import LLM_PROVIDER
+from core.handlers.chat import ChatHandler
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def candidate(handler, index, args, latencies, errors):
+    for message in range(args.messages):
+        prompt = f"How should I approach step {message} of the task?"
+        started = time.perf_counter()
+        try:
+            if args.stream:
+                first = None
+                async for _ in handler.stream_chat(f"bench-{index}", args.question_id, prompt):
+                    first = first or time.perf_counter()
+                latencies.append((first or time.perf_counter()) - started)
+            else:
+                await handler.process_chat(f"bench-{index}", args.question_id, prompt)
+                latencies.append(time.perf_counter() - started)
+        except Exception:
+            errors.append(index)
+
+
+async def run(args):
+    handler = ChatHandler()
+    latencies, errors = list(), list()
+    started = time.perf_counter()
+    await asyncio.gather(*(candidate(handler, i, args, latencies, errors) for i in range(args.candidates)))
+    elapsed = time.perf_counter() - started
+
+    label = "time to first token" if args.stream else "latency"
+    print(f"messages:          {len(latencies)} ok, {len(errors)} failed in {elapsed:.2f} s")
+    print(f"throughput:        {len(latencies) / elapsed:.1f} messages/s")
+    print(f"{label} p50:  {percentile(latencies, 0.5) * 1000:.1f} ms")
+    print(f"{label} p95:  {percentile(latencies, 0.95) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=5)
+    parser.add_argument("--question-id", default="coding_task_1")
+    parser.add_argument("--stream", action="store_true")
+    args = parser.parse_args()
+
+    if LLM_PROVIDER != "mock":
+        parser.error(f"LLM_PROVIDER is {LLM_PROVIDER}; set it to mock in the CHAT section")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Per-request handler setup cost: constructing every handler per request (the previous behaviour)
+versus resolving the app-lifetime handlers through the FastAPI dependencies.
+
+Needs the same configuration and reachable MongoDB/PostgreSQL/Git provider as the service.
+
+    cd backend && python -m benchmarks.handler_setup --iterations 20
+"""
+import argparse
+import time
+from types import SimpleNamespace
+
+from core.dependencies import HANDLER_FACTORIES, build_handlers, _get_handler
+
+
+def per_request_construction(iterations: int) -> dict:
+    timings = dict()
+    for name, factory in HANDLER_FACTORIES.items():
+        started = time.perf_counter()
+        for _ in range(iterations):
+            factory()
+        timings[name] = (time.perf_counter() - started) / iterations
+    return timings
+
+
+def app_lifetime_lookup(iterations: int) -> dict:
+    state = SimpleNamespace()
+    build_handlers(state)
+    request = SimpleNamespace(app=SimpleNamespace(state=state))
+    timings = dict()
+    for name in HANDLER_FACTORIES:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            _get_handler(request, name)
+        timings[name] = (time.perf_counter() - started) / iterations
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    before = per_request_construction(args.iterations)
+    after = app_lifetime_lookup(args.iterations)
+
+    print(f"{'handler':<22}{'per request (ms)':>18}{'app lifetime (ms)':>20}")
+    for name in HANDLER_FACTORIES:
+        print(f"{name:<22}{before[name] * 1000:>18.3f}{after[name] * 1000:>20.4f}")
+    print(f"{'total':<22}{sum(before.values()) * 1000:>18.3f}{sum(after.values()) * 1000:>20.4f}")
+
+
+if __name__ == "__main__":
+    main()
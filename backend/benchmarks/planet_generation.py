@@ -0,0 +1,83 @@
+"""
+Planet generation for coding tasks 3 and 4: the per-planet loop (the previous implementation of
+DataGen.generate_solar_system_with_ether) versus the batched generator.
+
+Both are seeded; the random streams differ, so the columns are compared by their distribution.
+
+    cd backend && python -m benchmarks.planet_generation --planets 10000 --repeat 3
+"""
+import argparse
+import time
+from random import shuffle
+
+import numpy as np
+import pandas as pd
+
+from core.handlers.data_gen import DataGen
+
+COLUMNS = ["Rock", "Water", "Air", "Fire", "Ether", "Liveability"]
+
+
+def per_planet(seed, num_planets):
+    rng = np.random.default_rng(seed)
+    required_liveable = max(1, int(num_planets * 0.05))
+    liveable_list, non_liveable_list = [], []
+    liveable_attempts, general_attempts = 3000, num_planets * 2
+
+    while len(liveable_list) < required_liveable and liveable_attempts > 0:
+        planet = DataGen.generate_planet_sample(rng)
+        if planet["Liveable"] == "Yes":
+            liveable_list.append(planet)
+        liveable_attempts -= 1
+
+    while len(liveable_list) + len(non_liveable_list) < num_planets and general_attempts > 0:
+        planet = DataGen.generate_planet_sample(rng)
+        if planet["Liveable"] == "Yes" and len(liveable_list) < required_liveable:
+            liveable_list.append(planet)
+        else:
+            non_liveable_list.append(planet)
+        general_attempts -= 1
+
+    all_planets = liveable_list + non_liveable_list
+    shuffle(all_planets)
+    for i, planet in enumerate(all_planets):
+        planet["Planet"] = f"Planet_{i + 1}"
+    return pd.DataFrame(all_planets)
+
+
+def batched(seed, num_planets):
+    return DataGen(seed=seed).generate_solar_system_with_ether(num_planets)
+
+
+def timed(func, args):
+    best, df = float("inf"), None
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        df = func(args.seed, args.planets)
+        best = min(best, time.perf_counter() - started)
+    return best, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--planets", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1729)
+    args = parser.parse_args()
+
+    loop_seconds, loop_df = timed(per_planet, args)
+    batch_seconds, batch_df = timed(batched, args)
+
+    print(f"per-planet loop:  {loop_seconds * 1000:9.1f} ms")
+    print(f"batched:          {batch_seconds * 1000:9.1f} ms  ({loop_seconds / batch_seconds:.0f}x)")
+    print()
+    print(f"{'column':<12}{'loop mean':>11}{'batch mean':>12}{'loop std':>10}{'batch std':>11}")
+    for column in COLUMNS:
+        print(f"{column:<12}{loop_df[column].mean():>11.4f}{batch_df[column].mean():>12.4f}"
+              f"{loop_df[column].std():>10.4f}{batch_df[column].std():>11.4f}")
+    print(f"{'Liveable':<12}{(loop_df['Liveable'] == 'Yes').mean():>11.4f}"
+          f"{(batch_df['Liveable'] == 'Yes').mean():>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
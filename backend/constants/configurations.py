@@ -62,6 +62,10 @@ POSTGRES_URI = config.get("POSTGRESQL", "POSTGRES_URI")
 POSTGRES_DB = config.get("POSTGRESQL", "POSTGRES_DB")
 POSTGRES_USER = config.get("POSTGRESQL", "POSTGRES_USER")
 POSTGRES_PASSWORD = config.get("POSTGRESQL", "POSTGRES_PASSWORD")
+# One connection per concurrent caller: blocking handler work runs on the offload thread pool
+POSTGRES_POOL_MIN = config.getint("POSTGRESQL", "POSTGRES_POOL_MIN", fallback=1)
+POSTGRES_POOL_MAX = config.getint("POSTGRESQL", "POSTGRES_POOL_MAX",
+                                  fallback=config.getint("OFFLOAD", "THREAD_WORKERS", fallback=32))
 
 # POSTGRESQL METADATA
 # POSTGRES_URI = config.get("POSTGRESQL", "POSTGRES_URI")
@@ -103,6 +107,30 @@ class LOG:
 #     completion_model_name = config.get("LLM", "COMPLETION_MODEL_NAME", fallback="KL-POC-GPT4-32k")
 #     completion_temperature = config.getint("LLM", "COMPLETION_TEMPERATURE", fallback=0)
 
+# Session tokens
+SESSION_SECRET = config.get("SESSION", "SESSION_SECRET", fallback="")
+SESSION_TTL_SECONDS = config.getint("SESSION", "SESSION_TTL_SECONDS", fallback=6 * 60 * 60)
+SESSION_CACHE_SIZE = config.getint("SESSION", "SESSION_CACHE_SIZE", fallback=4096)
+SESSION_ENFORCE = config.getboolean("SESSION", "SESSION_ENFORCE", fallback=False)
+
+# Admission control (entries are path:requests_per_second:burst)
+ADMISSION_RATE_LIMITS = config.get("ADMISSION", "RATE_LIMITS",
+                                   fallback="/auth/verify:20:40,"
+                                            "/mcq/start-assessment:5:20,"
+                                            "/coding-task/start-assessment:5:20")
+ADMISSION_MAX_WAIT_SECONDS = config.getfloat("ADMISSION", "MAX_WAIT_SECONDS", fallback=2.0)
+ADMISSION_PROVISIONING_ROUTES = config.get("ADMISSION", "PROVISIONING_ROUTES",
+                                           fallback="/mcq/start-assessment,/coding-task/start-assessment")
+ADMISSION_MAX_PROVISIONING = config.getint("ADMISSION", "MAX_PROVISIONING", fallback=4)
+ADMISSION_PROVISIONING_QUEUE = config.getint("ADMISSION", "PROVISIONING_QUEUE", fallback=100)
+ADMISSION_PROVISIONING_TIMEOUT = config.getfloat("ADMISSION", "PROVISIONING_TIMEOUT", fallback=30.0)
+
+# Offloading of blocking work
+OFFLOAD_THREAD_WORKERS = config.getint("OFFLOAD", "THREAD_WORKERS", fallback=32)
+OFFLOAD_PROCESS_WORKERS = config.getint("OFFLOAD", "PROCESS_WORKERS", fallback=os.cpu_count() or 2)
+EVENT_LOOP_LAG_INTERVAL = config.getfloat("OFFLOAD", "EVENT_LOOP_LAG_INTERVAL", fallback=0.5)
+EVENT_LOOP_LAG_WARN_SECONDS = config.getfloat("OFFLOAD", "EVENT_LOOP_LAG_WARN_SECONDS", fallback=0.2)
+
 # Git Configuration
 GIT_PROVIDER = config.get("GIT", "GIT_PROVIDER", fallback="gitlab")
 
@@ -111,6 +139,12 @@ GITLAB_SERVER_URL = config.get("GITLAB", "GITLAB_SERVER_URL", fallback="https://
 GITLAB_API_VERSION = config.get("GITLAB", "GITLAB_API_VERSION", fallback="v4")
 GITLAB_PROJECT_ID = config.get("GITLAB", "GITLAB_PROJECT_ID", fallback="12345")
 GITLAB_ACCESS_TOKEN = config.get("GITLAB", "GITLAB_ACCESS_TOKEN", fallback="your_gitlab_token")
+GITLAB_MAX_CONCURRENCY = config.getint("GITLAB", "GITLAB_MAX_CONCURRENCY", fallback=20)
+
+# Outbound HTTP
+HTTP_MAX_CONNECTIONS = config.getint("HTTP", "MAX_CONNECTIONS", fallback=100)
+HTTP_MAX_KEEPALIVE_CONNECTIONS = config.getint("HTTP", "MAX_KEEPALIVE_CONNECTIONS", fallback=20)
+HTTP_TIMEOUT_SECONDS = config.getfloat("HTTP", "TIMEOUT_SECONDS", fallback=10.0)
 
 # GitHub Configuration
 GITHUB_API_URL = config.get("GITHUB", "GITHUB_API_URL", fallback="https://api.github.com")
@@ -124,6 +158,82 @@ LLM_API_KEY = config.get("CHAT", "LLM_API_KEY", fallback="")
 LLM_MODEL = config.get("CHAT", "LLM_MODEL", fallback="claude-3-sonnet-20240229")
 MLFLOW_TRACKING_URI = config.get("CHAT", "MLFLOW_TRACKING_URI", fallback="http://localhost:5080")
 TEMPERATURE = config.getfloat("CHAT", "TEMPERATURE", fallback=0.7)
+# Maximum in-flight LLM calls per worker (entries are provider:limit), shared fairly across users
+CHAT_LLM_CONCURRENCY = config.get("CHAT", "LLM_CONCURRENCY", fallback="anthropic:16,openai:16,azure:16")
+CHAT_LLM_DEFAULT_CONCURRENCY = config.getint("CHAT", "LLM_DEFAULT_CONCURRENCY", fallback=8)
+# Seconds an LLM call may wait for a slot before it is rejected
+CHAT_LLM_QUEUE_DEADLINE_SECONDS = config.getfloat("CHAT", "LLM_QUEUE_DEADLINE_SECONDS", fallback=15)
+
+# LLM router: names of [LLM_BACKEND:<name>] sections (PROVIDER, MODEL, API_KEY, WEIGHT and the AZURE_* keys);
+# empty to use the single provider above. Concurrency limits then apply per backend name.
+CHAT_LLM_BACKENDS = [name.strip() for name in config.get("CHAT", "LLM_BACKENDS", fallback="").split(",")
+                     if name.strip()]
+CHAT_LLM_BACKEND_SETTINGS = {name: {key.upper(): value for key, value in config.items(f"LLM_BACKEND:{name}")}
+                             if config.has_section(f"LLM_BACKEND:{name}") else dict()
+                             for name in CHAT_LLM_BACKENDS}
+# Start a second call on another backend once a call runs past this latency percentile (0 disables hedging)
+CHAT_LLM_HEDGE_PERCENTILE = config.getfloat("CHAT", "LLM_HEDGE_PERCENTILE", fallback=0)
+CHAT_LLM_HEDGE_MIN_SAMPLES = config.getint("CHAT", "LLM_HEDGE_MIN_SAMPLES", fallback=20)
+# A backend failing with 429/5xx or a timeout is skipped for a cooldown that doubles per consecutive failure
+CHAT_LLM_FAILURE_COOLDOWN_SECONDS = config.getfloat("CHAT", "LLM_FAILURE_COOLDOWN_SECONDS", fallback=5)
+CHAT_LLM_MAX_COOLDOWN_SECONDS = config.getfloat("CHAT", "LLM_MAX_COOLDOWN_SECONDS", fallback=120)
+
+# Chat history store ("mongo" for the shared store behind an in-process hot tier, "memory" for a single worker)
+CHAT_HISTORY_BACKEND = config.get("CHAT", "HISTORY_BACKEND", fallback="mongo")
+CHAT_HISTORY_COLLECTION = config.get("MONGODB", "CHAT_HISTORY_COLLECTION", fallback="chat_history")
+CHAT_HISTORY_CACHE_SIZE = config.getint("CHAT", "HISTORY_CACHE_SIZE", fallback=1000)
+CHAT_HISTORY_CACHE_TTL = config.getfloat("CHAT", "HISTORY_CACHE_TTL", fallback=900)
+
+# Prompt token budget per chat turn; older turns beyond it are folded into a rolling summary
+CHAT_CONTEXT_TOKEN_BUDGET = config.getint("CHAT", "CONTEXT_TOKEN_BUDGET", fallback=8000)
+CHAT_CONTEXT_FOLD_RATIO = config.getfloat("CHAT", "CONTEXT_FOLD_RATIO", fallback=0.6)
+# Offline token estimation: initial Anthropic tokens per cl100k token (then calibrated on reported usage),
+# and memoized counts kept per worker
+CHAT_ANTHROPIC_TOKEN_RATIO = config.getfloat("CHAT", "ANTHROPIC_TOKEN_RATIO", fallback=1.15)
+CHAT_TOKEN_CACHE_SIZE = config.getint("CHAT", "TOKEN_CACHE_SIZE", fallback=20000)
+
+# Opt-in cache of answers to the first prompt of a conversation, per question
+CHAT_RESPONSE_CACHE_ENABLED = config.getboolean("CHAT", "RESPONSE_CACHE_ENABLED", fallback=False)
+CHAT_RESPONSE_CACHE_SIZE = config.getint("CHAT", "RESPONSE_CACHE_SIZE", fallback=2000)
+CHAT_RESPONSE_CACHE_TTL = config.getfloat("CHAT", "RESPONSE_CACHE_TTL", fallback=86400)
+
+# Mark the system prompt as a provider-side cache breakpoint (Anthropic; OpenAI caches prefixes automatically)
+CHAT_PROMPT_CACHING = config.getboolean("CHAT", "PROMPT_CACHING", fallback=True)
+
+# Notebook cells beyond the problem description retrieved per turn (BM25 over the task notebook)
+CHAT_RETRIEVAL_TOP_K = config.getint("CHAT", "RETRIEVAL_TOP_K", fallback=3)
+CHAT_RETRIEVAL_MIN_SCORE = config.getfloat("CHAT", "RETRIEVAL_MIN_SCORE", fallback=1.0)
+CHAT_RETRIEVAL_MAX_CHARS = config.getint("CHAT", "RETRIEVAL_MAX_CHARS", fallback=1500)
+# Sections of the problem description always in the system prompt; the others are retrieved when relevant
+CHAT_PROMPT_SECTIONS = [section.strip() for section in config.get(
+    "CHAT", "PROMPT_SECTIONS", fallback="Scenario,Your Task,Available Data,Analysis Objectives").split(",")]
+
+# Local filter for obvious requests for the solution: "off", "log" (matches are only recorded for
+# review) or "enforce" (matches get a canned refusal instead of an LLM call)
+CHAT_PREFILTER_MODE = config.get("CHAT", "PREFILTER_MODE", fallback="log").lower()
+CHAT_PREFILTER_RULES_FILE = config.get("CHAT", "PREFILTER_RULES_FILE", fallback="")
+CHAT_PREFILTER_MODEL_PATH = config.get("CHAT", "PREFILTER_MODEL_PATH", fallback="")
+CHAT_PREFILTER_THRESHOLD = config.getfloat("CHAT", "PREFILTER_THRESHOLD", fallback=0.9)
+CHAT_PREFILTER_REFUSAL = config.get(
+    "CHAT", "PREFILTER_REFUSAL",
+    fallback="I can't provide the solution to the task, but I'm happy to help you work towards it yourself. "
+             "Tell me which part you are stuck on, or what you have tried so far, and we can think it through."
+)
+CHAT_FLAGGED_PROMPTS_COLLECTION = config.get("MONGODB", "CHAT_FLAGGED_PROMPTS_COLLECTION",
+                                             fallback="chat_flagged_prompts")
+
+# Mock provider (LLM_PROVIDER = mock) for offline load tests of the chat path
+MOCK_LLM_LATENCY_MS = config.getfloat("MOCK_LLM", "LATENCY_MS", fallback=800)
+# fixed, uniform (+/- jitter) or lognormal (jitter is the standard deviation)
+MOCK_LLM_LATENCY_DISTRIBUTION = config.get("MOCK_LLM", "LATENCY_DISTRIBUTION", fallback="lognormal")
+MOCK_LLM_LATENCY_JITTER_MS = config.getfloat("MOCK_LLM", "LATENCY_JITTER_MS", fallback=300)
+MOCK_LLM_RESPONSE_TOKENS = config.getint("MOCK_LLM", "RESPONSE_TOKENS", fallback=200)
+MOCK_LLM_CHUNK_TOKENS = config.getint("MOCK_LLM", "CHUNK_TOKENS", fallback=4)
+MOCK_LLM_CHUNK_DELAY_MS = config.getfloat("MOCK_LLM", "CHUNK_DELAY_MS", fallback=20)
+MOCK_LLM_ERROR_RATE = config.getfloat("MOCK_LLM", "ERROR_RATE", fallback=0.0)
+MOCK_LLM_RESPONSE_TEMPLATE = config.get("MOCK_LLM", "RESPONSE_TEMPLATE",
+                                        fallback="Mock answer {digest} after {turns} messages to: {prompt}")
+MOCK_LLM_SEED = config.getint("MOCK_LLM", "SEED", fallback=1729)
 
 # Azure OpenAI specific settings
 AZURE_API_VERSION = config.get("CHAT", "AZURE_API_VERSION", fallback="2024-02-15-preview")
@@ -132,6 +242,21 @@ AZURE_DEPLOYMENT_NAME = config.get("CHAT", "AZURE_DEPLOYMENT_NAME", fallback="")
 
 # MLflow configurations
 MLFLOW_ENABLE_AUTOLOG = config.getboolean("MLFLOW", "ENABLE_AUTOLOG", fallback=True)
+# Fraction of LLM calls traced by autolog (0 disables tracing)
+MLFLOW_TRACE_SAMPLING_RATIO = config.getfloat("MLFLOW", "TRACE_SAMPLING_RATIO", fallback=0.1)
+# Chat turns are logged as runs of one experiment, tagged with the session, by a background writer
+MLFLOW_CHAT_EXPERIMENT = config.get("MLFLOW", "CHAT_EXPERIMENT", fallback="grad-eval-chat")
+MLFLOW_QUEUE_SIZE = config.getint("MLFLOW", "QUEUE_SIZE", fallback=10000)
+MLFLOW_BATCH_SIZE = config.getint("MLFLOW", "BATCH_SIZE", fallback=50)
+MLFLOW_FLUSH_INTERVAL = config.getfloat("MLFLOW", "FLUSH_INTERVAL", fallback=5.0)
 
 CODING_TASK_NOTEBOOK = config.get("ASSESSMENT", "CODING_TASK_NOTEBOOK",
                                   fallback=os.path.join("assets", "responses"))
+# Seconds between checks of a task notebook's mtime for the cached chat system prompt
+CHAT_PROMPT_CACHE_CHECK_SECONDS = config.getfloat("ASSESSMENT", "PROMPT_CACHE_CHECK_SECONDS", fallback=60)
+
+# Content-addressed cache of generated coding task artifacts, served by hardlinks into gen_data
+ARTIFACT_CACHE_ENABLED = config.getboolean("ARTIFACT_CACHE", "ENABLED", fallback=True)
+# On the filesystem of gen_data, otherwise hits are copied instead of linked
+ARTIFACT_CACHE_DIR = config.get("ARTIFACT_CACHE", "DIR", fallback=os.path.join("gen_data", ".cache"))
+ARTIFACT_CACHE_MAX_BYTES = config.getint("ARTIFACT_CACHE", "MAX_BYTES", fallback=2 * 1024 ** 3)
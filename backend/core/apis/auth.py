@@ -1,25 +1,28 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from constants import constants
 from ..handlers.auth import AuthHandler
 from ..handlers.captcha import CaptchaHandler
+from ..dependencies import get_auth_handler, get_captcha_handler
 from ..schemas.requests import auth as req_auth
 from ..schemas.responses import auth as res_auth
 from utils.logger_utility import logger
+from utils.session_utility import SessionTokenManager
+from utils.offload_utility import offloader
 
 router_auth = APIRouter(prefix="/auth")
 
 
 @router_auth.post("/verify",
                   response_model=res_auth.AuthResponse)
-async def verify_auth(request: req_auth.GitlabAuthRequest):
+async def verify_auth(request: req_auth.GitlabAuthRequest,
+                      auth_handler: AuthHandler = Depends(get_auth_handler)):
     """Verify user authentication and captcha"""
     try:
         logger.debug(f"Received authentication request for user: {request.full_name}")
-        auth_handler = AuthHandler()
 
         try:
             logger.debug("Initiating authentication verification")
-            is_authenticated, user_id, error_message, assessment_info = auth_handler.verify_gitlab_auth(
+            is_authenticated, user_id, error_message, assessment_info = await auth_handler.verify_gitlab_auth(
                 full_name=request.full_name,
                 token=request.token,
                 captcha_session_id=request.captcha_session_id,
@@ -47,6 +50,8 @@ async def verify_auth(request: req_auth.GitlabAuthRequest):
 
         if is_authenticated:
             logger.debug(f"Authentication successful for user_id: {user_id}")
+            session_token = SessionTokenManager().issue(user_id=user_id,
+                                                        start_time=assessment_info["start_time"])
             return res_auth.AuthResponse(
                 status=constants.ResponseStates.SUCCESS,
                 message="Authentication successful",
@@ -54,7 +59,8 @@ async def verify_auth(request: req_auth.GitlabAuthRequest):
                     "authenticated": True,
                     "user_id": user_id,
                     "assessment_status": assessment_info["status"],
-                    "assessment_start_time": assessment_info["start_time"]
+                    "assessment_start_time": assessment_info["start_time"],
+                    "session_token": session_token
                 }
             )
         else:
@@ -76,12 +82,11 @@ async def verify_auth(request: req_auth.GitlabAuthRequest):
 
 @router_auth.get("/captcha",
                  response_model=res_auth.CaptchaResponse)
-async def generate_captcha():
+async def generate_captcha(captcha_handler: CaptchaHandler = Depends(get_captcha_handler)):
     """Generate a new captcha image"""
     try:
         logger.debug("Generating new captcha")
-        captcha_handler = CaptchaHandler()
-        captcha_data = captcha_handler.generate_captcha()
+        captcha_data = await offloader.run_blocking(captcha_handler.generate_captcha)
 
         logger.debug(f"Captcha generated successfully with session ID: {captcha_data['session_id']}")
         return res_auth.CaptchaResponse(
@@ -1,15 +1,23 @@
-from fastapi import APIRouter, HTTPException
+import json
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from core.schemas.requests.chat import ChatRequest
 from core.schemas.responses.chat import ChatResponse
 from core.handlers.chat import ChatHandler
+from exceptions.chat import ChatException
+from core.dependencies import get_session, resolve_user_id, get_chat_handler
 from utils.logger_utility import logger
+from utils.session_utility import SessionClaims
 
 
 router_chat = APIRouter(prefix="/chat")
 
 
 @router_chat.post("/chat", response_model=ChatResponse)
-async def process_chat(request: ChatRequest) -> ChatResponse:
+async def process_chat(request: ChatRequest,
+                       session: Optional[SessionClaims] = Depends(get_session),
+                       chat_handler: ChatHandler = Depends(get_chat_handler)) -> ChatResponse:
     """
     Process a chat request and return the response
     
@@ -22,12 +30,11 @@ async def process_chat(request: ChatRequest) -> ChatResponse:
     Raises:
         HTTPException: If there's an error processing the chat
     """
+    request.user_id = resolve_user_id(session, request.user_id)
     try:
         logger.debug(f"Received chat request for user {request.user_id}, question {request.question_id}")
-
-        chat_handler = ChatHandler()
         # Process the chat request
-        response = chat_handler.process_chat(
+        response = await chat_handler.process_chat(
             user_id=request.user_id,
             question_id=request.question_id,
             prompt=request.prompt
@@ -42,9 +49,52 @@ async def process_chat(request: ChatRequest) -> ChatResponse:
             response=response["response"]
         )
         
+    except ChatException as e:
+        logger.error(f"Error processing chat request: {e.message}")
+        raise HTTPException(
+            status_code=e.status_code or 500,
+            detail=e.message
+        )
     except Exception as e:
         logger.error(f"Error processing chat request: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to process chat request: {str(e)}"
         )
+
+
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    """Format a server-sent event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@router_chat.post("/stream")
+async def stream_chat(request: ChatRequest,
+                      session: Optional[SessionClaims] = Depends(get_session),
+                      chat_handler: ChatHandler = Depends(get_chat_handler)) -> StreamingResponse:
+    """
+    Stream the chat response as server-sent events
+
+    Every ``message`` event carries a ``delta`` of the markdown response. The stream ends with a
+    ``done`` event once the full response was stored in the history, or an ``error`` event.
+    """
+    request.user_id = resolve_user_id(session, request.user_id)
+    logger.debug(f"Received streaming chat request for user {request.user_id}, question {request.question_id}")
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for delta in chat_handler.stream_chat(user_id=request.user_id,
+                                                        question_id=request.question_id,
+                                                        prompt=request.prompt):
+                yield _sse({"delta": delta})
+            yield _sse({"user_id": request.user_id, "question_id": request.question_id}, event="done")
+        except ChatException as e:
+            logger.error(f"Error streaming chat response: {e.message}")
+            yield _sse({"detail": e.message, "status_code": e.status_code}, event="error")
+        except Exception as e:
+            logger.error(f"Error streaming chat response: {str(e)}", exc_info=True)
+            yield _sse({"detail": f"Failed to process chat request: {str(e)}"}, event="error")
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -1,5 +1,5 @@
 import json
-from fastapi import APIRouter, HTTPException, File, UploadFile
+from fastapi import APIRouter, HTTPException, File, UploadFile, Depends
 from fastapi.responses import FileResponse
 from typing import Optional
 
@@ -8,19 +8,26 @@ from ..schemas.requests import coding_task as req_coding_task
 # from ..schemas.responses import coding_task as res_coding_task
 from ..handlers.coding_task import CodingTaskHandler
 from utils.logger_utility import logger
+from utils.session_utility import SessionClaims, SessionTokenManager
+from utils.offload_utility import offloader
+from ..dependencies import get_session, resolve_user_id, get_coding_task_handler, get_assessment_handler
 from ..schemas.responses import mcq as res_mcq
 from ..schemas.requests import coding_task as req_mcq
 from constants import constants
+from exceptions.session import SessionException
 
 router_coding_task = APIRouter(prefix=constants.Routes.CODING_TASK)
 
 
 @router_coding_task.post("/download-task-file")
-async def download_task_file(request: req_coding_task.DownloadTaskFileRequest) -> FileResponse:
+async def download_task_file(request: req_coding_task.DownloadTaskFileRequest,
+                             session: Optional[SessionClaims] = Depends(get_session),
+                             handler: CodingTaskHandler = Depends(get_coding_task_handler)) -> FileResponse:
     """Download a coding task zip file"""
+    user_id = resolve_user_id(session, request.user_id)
     try:
-        handler = CodingTaskHandler()
-        file_path = handler.get_task_file_path(user_id=request.user_id, question_id=request.question_id)
+        file_path = await offloader.run_blocking(handler.get_task_file_path,
+                                                 user_id=user_id, question_id=request.question_id)
 
         if not file_path:
             raise HTTPException(status_code=404, detail="Task file not found")
@@ -42,14 +49,16 @@ async def download_task_file(request: req_coding_task.DownloadTaskFileRequest) -
 @router_coding_task.post("/next-task", response_model=req_coding_task.NextTaskResponse)
 async def next_task(request_data: str,
                     notebook_file: Optional[UploadFile] = File(None),
-                    solution_file: Optional[UploadFile] = File(None)) -> req_coding_task.NextTaskResponse:
+                    solution_file: Optional[UploadFile] = File(None),
+                    session: Optional[SessionClaims] = Depends(get_session),
+                    handler: CodingTaskHandler = Depends(get_coding_task_handler)) -> req_coding_task.NextTaskResponse:
     """Get the next coding task for a user"""
     try:
-        handler = CodingTaskHandler()
         # Parse the JSON data string into a dictionary
         json_data = json.loads(request_data)
         # Validate and create the Pydantic model
         data = req_coding_task.NextTaskRequest(**json_data)
+        data.user_id = resolve_user_id(session, data.user_id)
 
         # If files are provided, commit them to git
         if solution_file or notebook_file:
@@ -65,7 +74,8 @@ async def next_task(request_data: str,
             )
 
         # Get next task
-        res = handler.get_next_task(user_id=data.user_id, current_question_id=data.question_id)
+        res = await offloader.run_blocking(handler.get_next_task,
+                                           user_id=data.user_id, current_question_id=data.question_id)
 
         return req_coding_task.NextTaskResponse(
             user_id=data.user_id,
@@ -73,6 +83,8 @@ async def next_task(request_data: str,
             body=res.get("question", None)  # This will be None if no more tasks
         )
 
+    except SessionException:
+        raise
     except ValueError as ve:
         logger.warning(f"Validation error in next_task: {str(ve)}")
         raise HTTPException(status_code=400, detail=str(ve))
@@ -83,22 +95,26 @@ async def next_task(request_data: str,
 
 @router_coding_task.post(constants.Apis.START_ASSESSMENT,
                          response_model=res_mcq.StartAssessmentResponse)
-async def start_assessment(request: req_mcq.StartAssessmentRequest):
+async def start_assessment(request: req_mcq.StartAssessmentRequest,
+                           session: Optional[SessionClaims] = Depends(get_session),
+                           assessment_handler: AssessmentHandler = Depends(get_assessment_handler)):
     """Start a new assessment for the authenticated user"""
+    user_id = resolve_user_id(session, request.user_id)
     try:
-        if not request.user_id:
+        if not user_id:
             raise HTTPException(
                 status_code=401,
                 detail="User ID is required"
             )
 
-        logger.debug(f"Starting assessment for user: {request.user_id}")
-        assessment_handler = AssessmentHandler()
-        assessment_handler.start_assessment(request.user_id, start_epoch=request.start_epoch)
+        logger.debug(f"Starting assessment for user: {user_id}")
+        start_time = await offloader.run_blocking(assessment_handler.start_assessment,
+                                                  user_id, start_epoch=request.start_epoch, session=session)
 
         return res_mcq.StartAssessmentResponse(
             status=constants.ResponseStates.SUCCESS,
-            message="Assessment started successfully"
+            message="Assessment started successfully",
+            session_token=SessionTokenManager().issue(user_id=user_id, start_time=start_time)
         )
 
     except ValueError as ve:
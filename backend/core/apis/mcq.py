@@ -1,29 +1,35 @@
-from fastapi import FastAPI, APIRouter, Request, HTTPException, Header
+from fastapi import FastAPI, APIRouter, Request, HTTPException, Header, Depends
 from typing import Optional
 
 from constants import constants
+from ..dependencies import get_session, resolve_user_id, get_mcq_handler, get_assessment_handler
 from ..handlers.mcq import MCQHandler
 from ..handlers.assessment import AssessmentHandler
 from ..schemas.responses import mcq as res_mcq
 from ..schemas.requests import mcq as req_mcq
 from utils.logger_utility import logger
+from utils.session_utility import SessionClaims, SessionTokenManager
+from utils.offload_utility import offloader
 
 router_mcq = APIRouter(prefix=constants.Routes.MCQ)
 
 
 @router_mcq.post(constants.Apis.NEXT_QUESTION,
                  response_model=res_mcq.NextQuestionResponse)
-async def next_question(request: req_mcq.NextQuestion):
+async def next_question(request: req_mcq.NextQuestion,
+                        session: Optional[SessionClaims] = Depends(get_session),
+                        mcq_handler: MCQHandler = Depends(get_mcq_handler)):
     """Get the next question from the database"""
+    user_id = resolve_user_id(session, request.user_id)
     try:
-        if not request.user_id:
+        if not user_id:
             raise HTTPException(
                 status_code=401,
                 detail="User ID is required"
             )
 
-        logger.debug(f"Fetching next question: {request.user_id}")
-        res = MCQHandler().get_next_question(user_id=request.user_id)
+        logger.debug(f"Fetching next question: {user_id}")
+        res = await offloader.run_blocking(mcq_handler.get_next_question, user_id=user_id)
         return res_mcq.NextQuestionResponse(
             status=constants.ResponseStates.SUCCESS,
             message="Successfully fetched next question",
@@ -46,17 +52,21 @@ async def next_question(request: req_mcq.NextQuestion):
 
 @router_mcq.post(constants.Apis.SUBMIT_RESPONSE,
                  response_model=res_mcq.NextQuestionResponse)
-async def submit_response(request: req_mcq.AnswerSubmission):
+async def submit_response(request: req_mcq.AnswerSubmission,
+                          session: Optional[SessionClaims] = Depends(get_session),
+                          mcq_handler: MCQHandler = Depends(get_mcq_handler)):
     """Get the next question from the database"""
+    user_id = resolve_user_id(session, request.user_id)
     try:
-        if not request.user_id:
+        if not user_id:
             raise HTTPException(
                 status_code=401,
                 detail="User ID is required"
             )
 
-        logger.debug(f"Submitting user's response: {request.user_id}")
-        MCQHandler().submit_response(user_id=request.user_id,
+        logger.debug(f"Submitting user's response: {user_id}")
+        await offloader.run_blocking(mcq_handler.submit_response,
+                                     user_id=user_id,
                                      question_id=request.question_id,
                                      selected_responses=request.selected_answers)
         return res_mcq.DefaultResponse(
@@ -80,25 +90,30 @@ async def submit_response(request: req_mcq.AnswerSubmission):
 
 @router_mcq.post(constants.Apis.START_ASSESSMENT,
                  response_model=res_mcq.StartAssessmentResponse)
-async def start_assessment(request: req_mcq.StartAssessmentRequest):
+async def start_assessment(request: req_mcq.StartAssessmentRequest,
+                           session: Optional[SessionClaims] = Depends(get_session),
+                           assessment_handler: AssessmentHandler = Depends(get_assessment_handler)):
     """Start a new assessment for the authenticated user"""
+    user_id = resolve_user_id(session, request.user_id)
     try:
-        if not request.user_id:
+        if not user_id:
             raise HTTPException(
                 status_code=401,
                 detail="User ID is required"
             )
 
-        logger.debug(f"Starting assessment for user: {request.user_id}")
-        assessment_handler = AssessmentHandler()
-        assessment_handler.start_assessment(
-            user_id=request.user_id,
-            start_epoch=request.start_epoch
+        logger.debug(f"Starting assessment for user: {user_id}")
+        start_time = await offloader.run_blocking(
+            assessment_handler.start_assessment,
+            user_id=user_id,
+            start_epoch=request.start_epoch,
+            session=session
         )
 
         return res_mcq.StartAssessmentResponse(
             status=constants.ResponseStates.SUCCESS,
-            message="Assessment started successfully"
+            message="Assessment started successfully",
+            session_token=SessionTokenManager().issue(user_id=user_id, start_time=start_time)
         )
 
     except ValueError as ve:
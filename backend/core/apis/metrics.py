@@ -0,0 +1,14 @@
+from typing import Optional
+
+from fastapi import APIRouter
+
+from utils.metrics_utility import metrics
+
+router_metrics = APIRouter(prefix="/metrics")
+
+
+@router_metrics.get("")
+async def get_metrics(prefix: Optional[str] = None):
+    """Process-local counters, gauges, timers and registered state (e.g. LLM backend health), optionally
+    filtered by name prefix"""
+    return metrics.snapshot(prefix=prefix)
@@ -0,0 +1,89 @@
+from typing import Optional
+
+from fastapi import Request
+
+from exceptions.session import SessionUserMismatchError
+from utils.logger_utility import logger
+from utils.session_utility import SessionClaims
+from .handlers.assessment import AssessmentHandler
+from .handlers.auth import AuthHandler
+from .handlers.captcha import CaptchaHandler
+from .handlers.chat import ChatHandler
+from .handlers.coding_task import CodingTaskHandler
+from .handlers.mcq import MCQHandler
+
+# app.state attribute -> factory of the app-lifetime handlers built in the lifespan hook
+HANDLER_FACTORIES = {
+    "auth_handler": AuthHandler,
+    "captcha_handler": CaptchaHandler,
+    "mcq_handler": MCQHandler,
+    "assessment_handler": AssessmentHandler,
+    "coding_task_handler": CodingTaskHandler,
+    "chat_handler": ChatHandler
+}
+
+
+def build_handlers(state) -> None:
+    """Build every handler once and keep it on the app state"""
+    for name, factory in HANDLER_FACTORIES.items():
+        try:
+            setattr(state, name, factory())
+            logger.debug(f"Initialized {factory.__name__}")
+        except Exception as e:
+            # Retried lazily by the first request that needs the handler
+            logger.error(f"Failed to initialize {factory.__name__} at startup: {str(e)}")
+            setattr(state, name, None)
+
+
+def _get_handler(request: Request, name: str):
+    handler = getattr(request.app.state, name, None)
+    if handler is None:
+        handler = HANDLER_FACTORIES[name]()
+        setattr(request.app.state, name, handler)
+    return handler
+
+
+def get_auth_handler(request: Request) -> AuthHandler:
+    return _get_handler(request, "auth_handler")
+
+
+def get_captcha_handler(request: Request) -> CaptchaHandler:
+    return _get_handler(request, "captcha_handler")
+
+
+def get_mcq_handler(request: Request) -> MCQHandler:
+    return _get_handler(request, "mcq_handler")
+
+
+def get_assessment_handler(request: Request) -> AssessmentHandler:
+    return _get_handler(request, "assessment_handler")
+
+
+def get_coding_task_handler(request: Request) -> CodingTaskHandler:
+    return _get_handler(request, "coding_task_handler")
+
+
+def get_chat_handler(request: Request) -> ChatHandler:
+    return _get_handler(request, "chat_handler")
+
+
+def get_session(request: Request) -> Optional[SessionClaims]:
+    """Claims of the verified session token, None when the request carries no token"""
+    return getattr(request.state, "session", None)
+
+
+def resolve_user_id(session: Optional[SessionClaims], user_id: Optional[str]) -> Optional[str]:
+    """
+    Resolve the acting user of a request
+
+    The verified session wins over the ``user_id`` in the request body; a body value that points
+    at another user is rejected.
+
+    Raises:
+        SessionUserMismatchError: If the body user_id differs from the session user
+    """
+    if session is None:
+        return user_id
+    if user_id and str(user_id) != session.user_id:
+        raise SessionUserMismatchError()
+    return session.user_id
@@ -3,13 +3,18 @@ import random
 from datetime import datetime
 import uuid
 import json
-from typing import List, Dict
+from concurrent.futures import Future
+from typing import List, Dict, Optional, Tuple
 from utils.mongo_utility import MongoDBClient
 from utils.postgres_utility import PostgresClient
 from utils.logger_utility import logger
 from utils.common_utils import CommonUtils
-from core.handlers.data_gen import PrepareCodingTask
-from constants.configurations import MCQ_COLLECTION, USER_COLLECTION
+from utils.session_utility import SessionClaims
+from utils.offload_utility import offloader
+from utils.metrics_utility import metrics
+from utils.artifact_cache_utility import artifact_cache
+from core.handlers.data_gen import prepare_coding_task, artifact_params
+from constants.configurations import MCQ_COLLECTION, USER_COLLECTION, ARTIFACT_CACHE_ENABLED
 
 
 class AssessmentHandler:
@@ -65,29 +70,32 @@ class AssessmentHandler:
             logger.error(f"Error creating schema/table: {str(e)}")
             raise
 
-    def generate_user_data(self, task_id, **kwargs):
+    def submit_user_data(self, task_id, **kwargs) -> Tuple[str, int, int, Future]:
+        """Start generating a task's artifacts in the offload process pool, unless they are cached"""
         num_samples = 10000
-        seed = kwargs.get("seed", 1729)
-        constraint = kwargs.get("constraint", 10)
+        seed = kwargs.pop("seed", 1729)
+        constraint = kwargs.pop("constraint", 10)
 
-        path = kwargs.get("path", None)
+        path = kwargs.pop("path", None)
         ref_path = os.path.join("assets", "responses")
 
         self._cu_.make_dirs(path)
 
-        try:
-
-            prep_obj = PrepareCodingTask(ref_path=ref_path, path=path, seed=seed)
+        kwargs["num_samples"] = num_samples
+        kwargs["distance_constraint"] = constraint
+        if ARTIFACT_CACHE_ENABLED:
+            # A repeated seed is served by linking the cached files, without a worker round trip
+            params = artifact_params(task_id, ref_path, seed, **kwargs)
+            meta = artifact_cache.fetch(artifact_cache.key(**params), path)
+            if meta is not None:
+                metrics.inc("artifact_cache.hits")
+                future = Future()
+                future.set_result(meta["result"])
+                return path, seed, constraint, future
+            metrics.inc("artifact_cache.misses")
 
-            kwargs["num_samples"] = num_samples
-            out = getattr(prep_obj, task_id)(**kwargs)
-            # prep_obj.coding_task_1()
-            # prep_obj.coding_task_2(num_samples=num_samples)
-            # prep_obj.coding_task_3(num_samples=num_samples)
-            # prep_obj.coding_task_4(num_samples=num_samples)
-            return path, seed, constraint, out
-        except Exception as e:
-            raise Exception(e)
+        future = offloader.submit_cpu_bound(prepare_coding_task, task_id, ref_path, path, seed, **kwargs)
+        return path, seed, constraint, future
 
     def prepare_mcq_section(self, user_id):
         try:
@@ -165,12 +173,18 @@ class AssessmentHandler:
              VALUES %s
              """
 
-            values = []
+            # Generate the datasets of all tasks in parallel worker processes
+            submitted = []
             for task in tasks:
+                logger.debug(f"Preparing coding task {task['_id']}")
+                submitted.append(self.submit_user_data(task_id=task["_id"], seed=seed, constraint=constraint,
+                                                        path=path))
+
+            values = []
+            for task, (path, seed, constraint, future) in zip(tasks, submitted):
                 task_id = task["_id"]
                 question = task["question"]
-                logger.debug(f"Preparing coding task {task_id}")
-                path, seed, constraint, out = self.generate_user_data(task_id=task_id, path=path)
+                out = future.result()
                 # Generate user data
                 transaction_id = uuid.uuid4()
                 values.append((
@@ -194,16 +208,19 @@ class AssessmentHandler:
             logger.warning(f"There was a problem when preparing the coding tasks: {e}", exc_info=True)
             return False
 
-    def start_assessment(self, user_id: str, start_epoch: int) -> bool:
+    def start_assessment(self, user_id: str, start_epoch: int,
+                         session: Optional[SessionClaims] = None) -> Optional[int]:
         """
-        Start a new assessment for a user or return active assessment questions
+        Start a new assessment for a user or resume the active one
         
         Args:
             user_id: The ID of the user taking the assessment
             start_epoch: Epoch time when assessment started
+            session: Verified session claims; when they carry a start time, the user lookup in MongoDB
+                is skipped
             
         Returns:
-            bool: True if assessment started successfully
+            Optional[int]: Epoch at which the user's assessment started
             
         Raises:
             ValueError: If user not found or if no questions are available
@@ -217,12 +234,20 @@ class AssessmentHandler:
             logger.debug(f"Starting assessment for user_id: {user_id}")
             
             # Check user's assessment status
-            user = self.user_collection.find_one({"user_id": user_id})
-            if not user:
-                logger.error(f"User {user_id} not found in database")
-                raise ValueError("User not found")
-                
-            if user.get("started_assessment", {}).get("status", False):
+            if session is not None and session.start_time is not None:
+                # Issued by start-assessment, so the assessment has started at the start time it carries.
+                # A token without one proves nothing: it may predate a start made from another device
+                active_start_time = session.start_time
+                has_started = True
+            else:
+                user = self.user_collection.find_one({"user_id": user_id})
+                if not user:
+                    logger.error(f"User {user_id} not found in database")
+                    raise ValueError("User not found")
+                active_start_time = user.get("started_assessment", {}).get("start_time")
+                has_started = user.get("started_assessment", {}).get("status", False)
+
+            if has_started:
                 logger.info(f"User {user_id} has an active assessment, fetching existing questions")
                 # Fetch existing questions from PostgreSQL
                 fetch_query = """
@@ -246,16 +271,17 @@ class AssessmentHandler:
                     
                     if questions:
                         logger.debug(f"Found {len(questions)} existing questions for user {user_id}")
-                        return questions
+                        return active_start_time
                     else:
                         logger.warning(f"Could not find questions in MongoDB, starting new assessment")
 
             self.prepare_mcq_section(user_id=user_id)
             self.prepare_coding_section(user_id=user_id, seed=seed, constraint=constraint, path=path)
 
-            # Update user's assessment status with start time
-            self.user_collection.update_one(
-                {"user_id": user_id},
+            # Update user's assessment status with start time, unless it already started: the start
+            # time of a running assessment is never reset
+            result = self.user_collection.update_one(
+                {"user_id": user_id, "started_assessment.status": {"$ne": True}},
                 {"$set": {
                     "started_assessment": {
                         "status": True,
@@ -263,10 +289,15 @@ class AssessmentHandler:
                     }
                 }}
             )
+            if result.matched_count == 0:
+                user = self.user_collection.find_one({"user_id": user_id}, {"started_assessment": 1})
+                active_start_time = (user or {}).get("started_assessment", {}).get("start_time")
+                logger.warning(f"Assessment of user {user_id} had already started at {active_start_time}")
+                return active_start_time
             logger.debug(f"Updated assessment status for user {user_id}")
 
             logger.debug("Assessment setup completed successfully")
-            return True
+            return start_epoch
             
         except ValueError as ve:
             logger.warning(f"Validation error in start_assessment: {str(ve)}")
@@ -6,11 +6,14 @@ from constants.configurations import (
     AUTH_AUDIT_COLLECTION,
     USER_COLLECTION,
     GITLAB_SERVER_URL,
-    GITLAB_API_VERSION
+    GITLAB_API_VERSION,
+    GITLAB_MAX_CONCURRENCY
 )
 from typing import Dict, Optional, Tuple, Union
 from .captcha import CaptchaHandler
-import requests
+from utils.http_utility import AsyncHTTPClient
+from utils.offload_utility import offloader
+import httpx
 import json
 
 
@@ -23,12 +26,14 @@ class AuthHandler:
             self.gitlab_url = GITLAB_SERVER_URL
             self.gitlab_api_version = GITLAB_API_VERSION
             self.captcha_handler = CaptchaHandler()
+            self.http_client = AsyncHTTPClient()
+            self.http_client.set_limit("gitlab", GITLAB_MAX_CONCURRENCY)
             logger.debug(f"AuthHandler initialized with GitLab URL: {self.gitlab_url}, API Version: {self.gitlab_api_version}")
         except Exception as e:
             logger.error(f"Failed to initialize Auth handler: {str(e)}")
             raise
 
-    def verify_gitlab_auth(self, full_name: str, token: str, captcha_session_id: str, captcha_text: str) -> Tuple[bool, Union[str, None], Optional[str], Optional[Dict]]:
+    async def verify_gitlab_auth(self, full_name: str, token: str, captcha_session_id: str, captcha_text: str) -> Tuple[bool, Union[str, None], Optional[str], Optional[Dict]]:
         """
         Verify user authentication with Gitlab and validate captcha
         
@@ -55,7 +60,7 @@ class AuthHandler:
             
             # First verify captcha
             logger.debug("Verifying captcha...")
-            if not self.captcha_handler.verify_captcha(captcha_session_id, captcha_text):
+            if not await offloader.run_blocking(self.captcha_handler.verify_captcha, captcha_session_id, captcha_text):
                 logger.warning(f"Captcha verification failed for session: {captcha_session_id}")
                 raise ValueError("Invalid captcha")
             logger.debug("Captcha verification successful")
@@ -65,7 +70,7 @@ class AuthHandler:
             headers = {"Authorization": f"Bearer {token}"}
             
             logger.debug(f"Making GitLab API request to: {api_url}")
-            response = requests.get(api_url, headers=headers)
+            response = await self.http_client.get(api_url, upstream="gitlab", headers=headers)
             
             logger.debug(f"GitLab API response status code: {response.status_code}")
             if response.status_code != 200:
@@ -92,7 +97,7 @@ class AuthHandler:
                 
             # Store user details and get assessment info
             logger.debug("Authentication successful, updating user details")
-            assessment_info = self._update_user_details(user_data)
+            assessment_info = await offloader.run_blocking(self._update_user_details, user_data)
             
             # Return success with user_id and assessment info
             user_id = str(user_data.get("id"))
@@ -101,6 +106,9 @@ class AuthHandler:
         except ValueError as ve:
             # Re-raise captcha validation errors
             raise
+        except httpx.TimeoutException as te:
+            logger.warning(f"GitLab API request timed out: {str(te)}")
+            return False, None, "GitLab did not respond in time, please try again", None
         except Exception as e:
             logger.error(f"Error during authentication: {str(e)}", exc_info=True)
             return False, None, "An unexpected error occurred during authentication", None
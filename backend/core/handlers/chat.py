@@ -1,6 +1,8 @@
 import os
 import json
-from typing import Annotated, Dict, Any, Optional, List
+import time
+from datetime import datetime
+from typing import Annotated, AsyncIterator, Callable, Dict, Any, Optional, List, Tuple
 from typing_extensions import TypedDict
 
 import mlflow
@@ -9,13 +11,23 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langchain_community.chat_models import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
-from langgraph.checkpoint.memory import MemorySaver
 from langchain.schema import HumanMessage, AIMessage, BaseMessage, SystemMessage
-from anthropic import Anthropic
-from tiktoken import encoding_for_model
 from langchain_community.chat_models.azure_openai import AzureChatOpenAI
 
 from utils.logger_utility import logger
+from utils.mongo_utility import MongoDBClient
+from utils.metrics_utility import metrics
+from utils.offload_utility import offloader
+from utils.llm_router_utility import BACKEND_METADATA_KEY, LLMBackend, LLMRouter
+from utils.tracking_utility import tracking
+from utils.token_utility import TokenCounter
+from utils.mock_llm_utility import MockChatModel
+from utils.conversation_utility import Conversation, get_conversation_store
+from .chat_context import ChatContextManager
+from .chat_cache import ResponseCache
+from .chat_filter import PromptFilter
+from .chat_retrieval import PassageIndex, notebook_passages, split_description
+from exceptions.chat import ConversationConflictError, UnknownQuestionError
 from constants.configurations import (
     LLM_PROVIDER,
     LLM_API_KEY,
@@ -23,13 +35,60 @@ from constants.configurations import (
     MLFLOW_TRACKING_URI,
     TEMPERATURE,
     MLFLOW_ENABLE_AUTOLOG,
+    MLFLOW_TRACE_SAMPLING_RATIO,
     CODING_TASK_NOTEBOOK,
     AZURE_DEPLOYMENT_NAME,
     AZURE_API_VERSION,
-    AZURE_API_BASE
+    AZURE_API_BASE,
+    CHAT_CONTEXT_TOKEN_BUDGET,
+    CHAT_CONTEXT_FOLD_RATIO,
+    CHAT_PROMPT_CACHE_CHECK_SECONDS,
+    CHAT_PROMPT_CACHING,
+    CHAT_RESPONSE_CACHE_ENABLED,
+    CHAT_RESPONSE_CACHE_SIZE,
+    CHAT_RESPONSE_CACHE_TTL,
+    CHAT_LLM_BACKENDS,
+    CHAT_LLM_BACKEND_SETTINGS,
+    CHAT_PREFILTER_MODE,
+    CHAT_PREFILTER_RULES_FILE,
+    CHAT_PREFILTER_MODEL_PATH,
+    CHAT_PREFILTER_THRESHOLD,
+    CHAT_PREFILTER_REFUSAL,
+    CHAT_FLAGGED_PROMPTS_COLLECTION,
+    CHAT_RETRIEVAL_TOP_K,
+    CHAT_RETRIEVAL_MIN_SCORE,
+    CHAT_RETRIEVAL_MAX_CHARS,
+    CHAT_PROMPT_SECTIONS
 )
 
 
+# Header of the notebook cells retrieved for a turn
+REFERENCE_HEADER = "-------- RELEVANT NOTEBOOK SECTIONS --------"
+
+# Scheduler queue shared by the summarization calls of all sessions
+SUMMARY_QUEUE = "__summaries__"
+
+# First MLflow version honouring MLFLOW_TRACE_SAMPLING_RATIO
+MLFLOW_TRACE_SAMPLING_MIN_VERSION = "3.1.0"
+
+
+class ChatState(TypedDict):
+    messages: Annotated[List[BaseMessage], add_messages]
+    system_prompt: str
+    summary: str
+    reference: str
+    user_id: str
+
+
+def build_chat_graph(chatbot: Callable[[ChatState], Dict[str, Any]], checkpointer=None):
+    """Build and compile the single-node chat graph"""
+    graph_builder = StateGraph(ChatState)
+    graph_builder.add_node("chatbot", chatbot)
+    graph_builder.add_edge(START, "chatbot")
+    graph_builder.add_edge("chatbot", END)
+    return graph_builder.compile(checkpointer=checkpointer)
+
+
 class ChatHandler:
     def __init__(self):
         try:
@@ -42,20 +101,59 @@ class ChatHandler:
             elif LLM_PROVIDER == "openai":
                 os.environ["OPENAI_API_KEY"] = LLM_API_KEY
 
-            # Initialize MLflow
-            if MLFLOW_ENABLE_AUTOLOG:
-                mlflow.langchain.autolog()
-
             # Verify MLflow version
             assert Version(mlflow.__version__) >= Version("2.17.2"), (
                 "This feature requires MLflow version 2.17.2 or newer."
             )
 
-            # Initialize LLM
-            self.llm = self._initialize_llm()
-
-            # Dictionary to store chat sessions
-            self.chat_sessions = {}
+            # Initialize MLflow; traces are sampled and exported in the background
+            if MLFLOW_ENABLE_AUTOLOG and MLFLOW_TRACE_SAMPLING_RATIO > 0:
+                if MLFLOW_TRACE_SAMPLING_RATIO < 1 and \
+                        Version(mlflow.__version__) < Version(MLFLOW_TRACE_SAMPLING_MIN_VERSION):
+                    # Older versions ignore the sampling ratio and would trace every call
+                    logger.warning(f"MLflow {mlflow.__version__} cannot sample traces (needs "
+                                   f"{MLFLOW_TRACE_SAMPLING_MIN_VERSION}), LangChain autologging is disabled")
+                else:
+                    os.environ.setdefault("MLFLOW_TRACE_SAMPLING_RATIO", str(MLFLOW_TRACE_SAMPLING_RATIO))
+                    os.environ.setdefault("MLFLOW_ENABLE_ASYNC_TRACE_LOGGING", "true")
+                    mlflow.langchain.autolog()
+
+            # Initialize the LLM backends; each instance is reused so its SDK client keeps a pooled connector
+            self.router = self._initialize_router()
+            metrics.register_source("llm.backends", self.router.stats)
+
+            # Token counting and context budgeting for the configured provider
+            self.token_counter = TokenCounter(provider=LLM_PROVIDER, model=LLM_MODEL)
+            self.context_manager = ChatContextManager(token_counter=self.count_tokens,
+                                                      budget=CHAT_CONTEXT_TOKEN_BUDGET,
+                                                      fold_ratio=CHAT_CONTEXT_FOLD_RATIO,
+                                                      summarizer=self._summarize)
+
+            # Parsed problem descriptions and rendered system prompts of the questions found on start-up
+            self._prompt_cache = dict()
+            self.warm_prompt_cache()
+
+            # Opt-in answers to first prompts shared by the candidates of a question
+            self.response_cache = ResponseCache(maxsize=CHAT_RESPONSE_CACHE_SIZE, ttl=CHAT_RESPONSE_CACHE_TTL) \
+                if CHAT_RESPONSE_CACHE_ENABLED else None
+            if self.response_cache is not None:
+                metrics.register_source("chat.response_cache", self.response_cache.stats)
+
+            # Obvious requests for the solution are recorded and, when enforced, get a canned refusal
+            # without an LLM call
+            prefilter_enabled = CHAT_PREFILTER_MODE in ("log", "enforce")
+            self.prefilter = PromptFilter(refusal=CHAT_PREFILTER_REFUSAL,
+                                          rules_file=CHAT_PREFILTER_RULES_FILE,
+                                          model_path=CHAT_PREFILTER_MODEL_PATH,
+                                          threshold=CHAT_PREFILTER_THRESHOLD) if prefilter_enabled else None
+            self.flagged_prompts = MongoDBClient().get_collection(CHAT_FLAGGED_PROMPTS_COLLECTION) \
+                if prefilter_enabled else None
+
+            # Chat history lives in the conversation store so that any worker can serve any session
+            self.conversation_store = get_conversation_store()
+
+            # Compile the graph once; it is stateless and receives the history with every call
+            self.graph = build_chat_graph(self._chatbot)
 
             logger.debug("Chat handler initialized successfully")
 
@@ -63,60 +161,78 @@ class ChatHandler:
             logger.error(f"Failed to initialize Chat handler: {str(e)}")
             raise
 
-    def _count_tokens_anthropic(self, text: str) -> int:
-        """Count tokens for Anthropic models using their API"""
-        try:
-            client = Anthropic()
-            return client.count_tokens(text)
-        except Exception as e:
-            logger.warning(f"Failed to count tokens with Anthropic: {str(e)}")
-            return 0
-
-    def _count_tokens_openai(self, text: str) -> int:
-        """Count tokens for OpenAI models using tiktoken"""
-        try:
-            enc = encoding_for_model(LLM_MODEL)
-            return len(enc.encode(text))
-        except Exception as e:
-            logger.warning(f"Failed to count tokens with tiktoken: {str(e)}")
-            return 0
-
     def count_tokens(self, text: str) -> int:
         """Count tokens using the appropriate counter for the configured LLM"""
         return self.token_counter(text)
 
-    def _initialize_llm(self):
-        """Initialize the LLM based on the configured provider."""
-        if LLM_PROVIDER == "anthropic":
+    @staticmethod
+    def _initialize_llm(provider: str = LLM_PROVIDER, model: str = LLM_MODEL, api_key: str = LLM_API_KEY,
+                        azure_deployment: str = AZURE_DEPLOYMENT_NAME, azure_api_version: str = AZURE_API_VERSION,
+                        azure_api_base: str = AZURE_API_BASE):
+        """Initialize the LLM of a provider, by default the configured one."""
+        if provider == "anthropic":
             return ChatAnthropic(
-                model=LLM_MODEL,
-                anthropic_api_key=LLM_API_KEY,
+                model=model,
+                anthropic_api_key=api_key,
                 temperature=TEMPERATURE,
             )
-        elif LLM_PROVIDER == "openai":
+        elif provider == "openai":
             return ChatOpenAI(
-                model=LLM_MODEL,
-                openai_api_key=LLM_API_KEY,
+                model=model,
+                openai_api_key=api_key,
                 temperature=TEMPERATURE,
             )
-        elif LLM_PROVIDER == "azure":
+        elif provider == "azure":
             return AzureChatOpenAI(
-                azure_deployment=AZURE_DEPLOYMENT_NAME,
-                openai_api_version=AZURE_API_VERSION,
-                azure_endpoint=AZURE_API_BASE,
-                openai_api_key=LLM_API_KEY,
+                azure_deployment=azure_deployment,
+                openai_api_version=azure_api_version,
+                azure_endpoint=azure_api_base,
+                openai_api_key=api_key,
                 temperature=TEMPERATURE,
             )
+        elif provider == "mock":
+            return MockChatModel()
         else:
-            raise ValueError(f"Unsupported LLM provider: {LLM_PROVIDER}")
+            raise ValueError(f"Unsupported LLM provider: {provider}")
+
+    def _initialize_router(self) -> LLMRouter:
+        """Route over the configured LLM backends, or the single configured provider"""
+        if not CHAT_LLM_BACKENDS:
+            return LLMRouter([LLMBackend(LLM_PROVIDER, LLM_PROVIDER, self._initialize_llm())])
+
+        backends = list()
+        for name in CHAT_LLM_BACKENDS:
+            settings = CHAT_LLM_BACKEND_SETTINGS.get(name, dict())
+            provider = settings.get("PROVIDER", LLM_PROVIDER)
+            llm = self._initialize_llm(
+                provider=provider,
+                model=settings.get("MODEL", LLM_MODEL),
+                api_key=settings.get("API_KEY", LLM_API_KEY),
+                azure_deployment=settings.get("AZURE_DEPLOYMENT_NAME", AZURE_DEPLOYMENT_NAME),
+                azure_api_version=settings.get("AZURE_API_VERSION", AZURE_API_VERSION),
+                azure_api_base=settings.get("AZURE_API_BASE", AZURE_API_BASE)
+            )
+            backends.append(LLMBackend(name, provider, llm, weight=float(settings.get("WEIGHT", 1))))
+        logger.debug(f"Routing chat over LLM backends {', '.join(b.name for b in backends)}")
+        return LLMRouter(backends)
 
-    def _load_problem_description(self, question_id: str) -> str:
-        """Load the problem description from the first cell of the notebook"""
+    @staticmethod
+    def _notebook_path(question_id: str) -> str:
+        this_question = question_id.replace('_', '-')
+        return os.path.join(CODING_TASK_NOTEBOOK, this_question, f"{this_question}.ipynb")
+
+    def _load_notebook(self, question_id: str) -> Dict[str, Any]:
+        """Load the task notebook of a question, empty if it cannot be read"""
         try:
-            this_question = question_id.replace('_', '-')
-            with open(os.path.join(CODING_TASK_NOTEBOOK, this_question, f"{this_question}.ipynb"), 'r') as f:
-                notebook = json.load(f)
+            with open(self._notebook_path(question_id), 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load notebook of {question_id}: {str(e)}")
+            return dict()
 
+    def _load_problem_description(self, notebook: Dict[str, Any]) -> str:
+        """Load the problem description from the first cell of the notebook"""
+        try:
             # Get the first cell's content
             first_cell = notebook['cells'][0]
             if first_cell['cell_type'] == 'markdown':
@@ -148,60 +264,307 @@ class ChatHandler:
 --------------------------
 """
 
-    def _get_session_id(self, user_id: str, question_id: str) -> str:
-        """Generate a unique session ID for user-question combination"""
-        return f"{user_id}_{question_id}"
+    def get_system_prompt(self, question_id: str) -> str:
+        """
+        System prompt of a question, served from the per-question cache.
 
-    def _setup_graph(self, session_id: str, system_prompt: str):
-        """Set up the LangGraph processing graph for a session"""
-        # Initialize memory for this session if not exists
-        if session_id not in self.chat_sessions:
-            self.chat_sessions[session_id] = {
-                'messages': [SystemMessage(content=system_prompt)]
-            }
+        The notebook's mtime is re-checked at most every CHAT_PROMPT_CACHE_CHECK_SECONDS, and the
+        description is re-parsed only when the notebook changed.
 
-        class State(TypedDict):
-            messages: Annotated[List[BaseMessage], add_messages]
-            session_id: str
+        Raises:
+            UnknownQuestionError: If the question had no notebook when the cache was warmed up
+        """
+        entry = self._prompt_cache.get(question_id)
+        if entry is None:
+            # Only the questions found on start-up are cached, so client-supplied ids cannot grow it
+            raise UnknownQuestionError(question_id)
+        if time.monotonic() - entry["checked_at"] < CHAT_PROMPT_CACHE_CHECK_SECONDS:
+            return entry["system_prompt"]
+        return self._load_prompt_entry(question_id, entry)
+
+    def _load_prompt_entry(self, question_id: str, entry: Optional[Dict[str, Any]] = None) -> str:
+        """(Re)load the cache entry of a question if its notebook changed since entry was made"""
+        now = time.monotonic()
 
-        def chatbot(state: State):
-            # Get the current messages from the session
-            session = self.chat_sessions[state['session_id']]
-            current_messages = session['messages']
+        try:
+            mtime = os.path.getmtime(self._notebook_path(question_id))
+        except OSError:
+            mtime = None
+
+        if entry is not None and entry["mtime"] == mtime:
+            entry["checked_at"] = now
+            return entry["system_prompt"]
+
+        notebook = self._load_notebook(question_id)
+        problem_description = self._load_problem_description(notebook)
+        # The core of the task stays in the prompt; optional sections (allowed libraries, evaluation
+        # criteria, bonus) and any further cells are retrieved per turn
+        kept, passages = split_description(problem_description,
+                                           CHAT_PROMPT_SECTIONS if CHAT_RETRIEVAL_TOP_K > 0 else [])
+        system_prompt = self._create_system_prompt(problem_description=kept)
+        skip = 1 if problem_description != "No problem description available" else 0
+        passages += notebook_passages(notebook, skip=skip, max_chars=CHAT_RETRIEVAL_MAX_CHARS)
+        self._prompt_cache[question_id] = {
+            "mtime": mtime,
+            "checked_at": now,
+            "problem_description": problem_description,
+            "system_prompt": system_prompt,
+            "index": PassageIndex([passage[:CHAT_RETRIEVAL_MAX_CHARS] for passage in passages])
+        }
+        metrics.set_gauge(f"chat.retrieval.indexed_passages.{question_id}", len(passages))
+        if entry is not None:
+            logger.debug(f"Reloaded problem description for {question_id} after the notebook changed")
+        return system_prompt
+
+    def retrieve_reference(self, question_id: str, prompt: str) -> str:
+        """Notebook cells relevant to the prompt, formatted for the system message"""
+        entry = self._prompt_cache.get(question_id)
+        if entry is None or CHAT_RETRIEVAL_TOP_K <= 0:
+            return ""
+        passages = entry["index"].search(prompt, k=CHAT_RETRIEVAL_TOP_K, min_score=CHAT_RETRIEVAL_MIN_SCORE)
+        metrics.observe("chat.retrieval.passages", len(passages))
+        if not passages:
+            return ""
+        return f"{REFERENCE_HEADER}\n" + "\n\n".join(passages) + "\n"
+
+    def warm_prompt_cache(self) -> None:
+        """Parse the notebook of every coding task found under CODING_TASK_NOTEBOOK"""
+        try:
+            folders = sorted(os.listdir(CODING_TASK_NOTEBOOK))
+        except OSError as e:
+            logger.warning(f"Could not warm up the prompt cache: {str(e)}")
+            return
+        for folder in folders:
+            if os.path.isfile(os.path.join(CODING_TASK_NOTEBOOK, folder, f"{folder}.ipynb")):
+                self._load_prompt_entry(folder.replace('-', '_'))
+        logger.debug(f"Prompt cache warmed up for {len(self._prompt_cache)} questions")
+        if CHAT_RETRIEVAL_TOP_K > 0:
+            for question_id, entry in self._prompt_cache.items():
+                if not entry["index"].passages:
+                    logger.warning(f"Nothing to retrieve for {question_id}: its notebook has no sections outside "
+                                   f"CHAT_PROMPT_SECTIONS and no further cells")
 
-            # Add new messages to the history
-            current_messages.extend(state["messages"])
+    def _get_session_id(self, user_id: str, question_id: str) -> str:
+        """Generate a unique session ID for user-question combination"""
+        return f"{user_id}_{question_id}"
 
-            # Generate response using the configured LLM
-            response = self.llm.invoke(current_messages)
+    def _system_message(self, system_prompt: str, summary: str = "", reference: str = "") -> SystemMessage:
+        """
+        System message with the prompt as a stable prefix shared by every candidate on a question
 
-            # Update session messages
-            self.chat_sessions[state['session_id']]['messages'] = current_messages + [response]
+        Anthropic caches only up to an explicit ``cache_control`` breakpoint, placed after the
+        instructions and problem so the rolling summary and the retrieved notebook cells behind it
+        do not invalidate the cache. OpenAI and Azure cache identical prefixes automatically; the
+        router flattens the blocks into plain text in the same order for them.
+        """
+        blocks = [block for block in (ChatContextManager.summary_block(summary), reference) if block]
+        if not CHAT_PROMPT_CACHING or not any(b.provider == "anthropic" for b in self.router.backends):
+            return SystemMessage(content="\n".join([system_prompt] + blocks))
+
+        content = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+        content.extend({"type": "text", "text": block} for block in blocks)
+        return SystemMessage(content=content)
+
+    @staticmethod
+    def _served_by(message: Optional[BaseMessage]) -> str:
+        """Name of the LLM backend that answered, as tagged by the router"""
+        metadata = getattr(message, "response_metadata", None) or dict()
+        return metadata.get(BACKEND_METADATA_KEY, LLM_PROVIDER)
+
+    def _record_usage(self, message: BaseMessage, prompt: List[BaseMessage]) -> None:
+        """Record prompt and cache token counts reported for a turn, and calibrate the token estimate"""
+        usage = getattr(message, "usage_metadata", None)
+        if not usage:
+            return
+        backend = self._served_by(message)
+        details = usage.get("input_token_details") or dict()
+        metrics.observe(f"chat.input_tokens.{backend}", usage.get("input_tokens", 0))
+        metrics.observe(f"chat.cache_read_tokens.{backend}", details.get("cache_read", 0) or 0)
+        metrics.observe(f"chat.cache_write_tokens.{backend}", details.get("cache_creation", 0) or 0)
+
+        if any(b.name == backend and b.provider == "anthropic" for b in self.router.backends):
+            estimated = sum(self.token_counter.raw(self._chunk_text(m)) for m in prompt)
+            self.token_counter.calibrate(estimated, usage.get("input_tokens", 0))
+
+    async def _chatbot(self, state: ChatState) -> Dict[str, Any]:
+        """Graph node: answer using the system prompt followed by the session history"""
+        system_message = self._system_message(state["system_prompt"], state.get("summary", ""),
+                                              state.get("reference", ""))
+        prompt = [system_message] + state["messages"]
+        response = await self.router.ainvoke(prompt, user_id=state.get("user_id", ""))
+        self._record_usage(response, prompt)
+        return {"messages": [response]}
+
+    async def _summarize(self, previous_summary: str, messages: List[BaseMessage]) -> str:
+        """Fold messages that fell out of the context window into the rolling summary"""
+        transcript = "\n".join(
+            f"{'Test taker' if isinstance(message, HumanMessage) else 'Assistant'}: {message.content}"
+            for message in messages
+        )
+        # Summaries are housekeeping: they share one queue so they never crowd out the candidates
+        response = await self.router.ainvoke([
+            SystemMessage(content="You maintain a concise running summary of a tutoring conversation between a "
+                                  "test taker and a help assistant. Keep the concepts discussed, hints already "
+                                  "given and the test taker's current approach. Do not include code verbatim. "
+                                  "Reply with the updated summary only."),
+            HumanMessage(content=f"Current summary:\n{previous_summary or '(empty)'}\n\n"
+                                 f"New messages:\n{transcript}")
+        ], user_id=SUMMARY_QUEUE)
+        return response.content if isinstance(response.content, str) else self._chunk_text(response)
+
+    def _save_turn(self, conversation: Conversation, turn: List[BaseMessage]) -> None:
+        """Append a prompt/response pair, re-reading once if another worker wrote in between"""
+        try:
+            self.conversation_store.append(conversation.session_id, turn, expected_version=conversation.version)
+        except ConversationConflictError:
+            logger.debug(f"Conversation {conversation.session_id} changed concurrently, appending to latest")
+            latest = self.conversation_store.load(conversation.session_id)
+            self.conversation_store.append(conversation.session_id, turn, expected_version=latest.version)
+
+    def _local_response(self, user_id: str, question_id: str, system_prompt: str, conversation: Conversation,
+                        prompt: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Answer that needs no LLM call: the canned refusal to a filtered prompt, or a cached answer
+        to the opening prompt of a conversation
 
-            return {"messages": [response]}
+        Returns:
+            Tuple of the response and its source ("prefilter" or "cache"), (None, None) otherwise
+        """
+        if self.prefilter is not None:
+            rule = self.prefilter.check(prompt)
+            if rule is not None:
+                enforced = CHAT_PREFILTER_MODE == "enforce"
+                logger.info(f"Prompt of {user_id} on {question_id} matched rule {rule}"
+                            f"{'' if enforced else ', answered in log-only mode'}")
+                offloader.thread_pool.submit(self._flag_prompt, user_id, question_id, prompt, rule, enforced)
+                if enforced:
+                    return self.prefilter.refusal, "prefilter"
+        if self.response_cache is not None and not conversation.version:
+            cached = self.response_cache.get(question_id, system_prompt, prompt)
+            if cached is not None:
+                return cached, "cache"
+        return None, None
+
+    def _flag_prompt(self, user_id: str, question_id: str, prompt: str, rule: str, enforced: bool) -> None:
+        """Record a prompt matched by the filter for review; only enforced matches were refused"""
+        try:
+            self.flagged_prompts.insert_one({
+                "user_id": user_id,
+                "question_id": question_id,
+                "prompt": prompt,
+                "rule": rule,
+                "enforced": enforced,
+                "created_at": datetime.utcnow()
+            })
+        except Exception as e:
+            logger.warning(f"Failed to record filtered prompt of {user_id}: {str(e)}")
 
-        graph_builder = StateGraph(State)
-        graph_builder.add_node("chatbot", chatbot)
-        graph_builder.add_edge(START, "chatbot")
-        graph_builder.add_edge("chatbot", END)
+    def _store_response(self, question_id: str, system_prompt: str, conversation: Conversation, prompt: str,
+                        response: str) -> None:
+        if self.response_cache is not None and not conversation.version and response:
+            self.response_cache.set(question_id, system_prompt, prompt, response)
 
-        # Create a memory saver for the graph
-        memory = MemorySaver()
+    @staticmethod
+    def _chunk_text(chunk: BaseMessage) -> str:
+        """Text carried by a streamed message chunk; providers may send a list of content blocks"""
+        if isinstance(chunk.content, str):
+            return chunk.content
+        return "".join(block.get("text", "") for block in chunk.content if isinstance(block, dict))
 
-        return graph_builder.compile(checkpointer=memory)
+    async def stream_chat(self, user_id: str, question_id: str, prompt: str) -> AsyncIterator[str]:
+        """
+        Stream the response to a chat prompt token by token
 
-    def _get_or_create_experiment(self, session_id: str) -> str:
-        """Get or create an MLflow experiment for the session"""
-        experiment = mlflow.get_experiment_by_name(session_id)
-        if experiment is None:
-            experiment_id = mlflow.create_experiment(session_id)
-            logger.debug(f"Created new MLflow experiment for session {session_id}")
-        else:
-            experiment_id = experiment.experiment_id
-            logger.debug(f"Using existing MLflow experiment for session {session_id}")
-        return experiment_id
+        The full response is appended to the conversation history once the stream completes, and
+        the time to the first token is recorded per provider.
 
-    def process_chat(self, user_id: str, question_id: str, prompt: str) -> Dict[str, Any]:
+        Args:
+            user_id: The ID of the user
+            question_id: The ID of the question
+            prompt: The user's prompt
+
+        Yields:
+            str: Text deltas of the response as they arrive from the model
+        """
+        session_id = self._get_session_id(user_id, question_id)
+        logger.debug(f"Streaming chat for session {session_id}")
+
+        system_prompt = self.get_system_prompt(question_id)
+        conversation = await offloader.run_blocking(self.conversation_store.load, session_id)
+        new_message = HumanMessage(content=prompt)
+        reference = self.retrieve_reference(question_id, prompt)
+        context = self.context_manager.build(system_prompt, conversation, new_message, reference)
+
+        started = time.perf_counter()
+        local, source = self._local_response(user_id, question_id, system_prompt, conversation, prompt)
+        if local is not None:
+            yield local
+            await offloader.run_blocking(self._save_turn, conversation, [new_message, AIMessage(content=local)])
+            self._track(session_id, user_id, question_id, prompt, {
+                "message_count": len(context.messages) + 2,
+                "latency_seconds": time.perf_counter() - started,
+                "response_cache_hit": float(source == "cache"),
+                "prefiltered": float(source == "prefilter")
+            })
+            return
+
+        first_token_at = None
+        parts = []
+        # Usage arrives on the first and last chunks; summing the chunks merges it
+        aggregate = None
+        system_message = self._system_message(context.system_prompt, context.summary, context.reference)
+        llm_prompt = [system_message] + context.messages
+        async for chunk in self.router.astream(llm_prompt, user_id=user_id):
+            aggregate = chunk if aggregate is None else aggregate + chunk
+            text = self._chunk_text(chunk)
+            if not text:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                metrics.observe(f"chat.ttft_seconds.{self._served_by(aggregate)}", first_token_at - started)
+            parts.append(text)
+            yield text
+
+        response = "".join(parts)
+        if not response:
+            raise ValueError("No response generated from the model")
+        metrics.observe(f"chat.stream_seconds.{self._served_by(aggregate)}", time.perf_counter() - started)
+        self._record_usage(aggregate, llm_prompt)
+        self._store_response(question_id, system_prompt, conversation, prompt, response)
+
+        await offloader.run_blocking(self._save_turn, conversation, [new_message, AIMessage(content=response)])
+        await self.context_manager.fold(conversation, context, self.conversation_store)
+        self._track(session_id, user_id, question_id, prompt, {
+            "message_count": len(context.messages) + 2,
+            "latency_seconds": time.perf_counter() - started,
+            "ttft_seconds": first_token_at - started,
+            "response_cache_hit": 0.0,
+            "prefiltered": 0.0
+        }, reply=aggregate)
+        logger.debug(f"Successfully streamed response for session {session_id}")
+
+    def _track(self, session_id: str, user_id: str, question_id: str, prompt: str, values: Dict[str, float],
+               reply: Optional[BaseMessage] = None) -> None:
+        """Queue a chat turn for the background MLflow writer; reply is the model's answer, if any"""
+        tags = {
+            "session_id": session_id,
+            "user_id": user_id,
+            "question_id": question_id,
+            "llm_provider": LLM_PROVIDER
+        }
+        if reply is not None:
+            tags["llm_backend"] = self._served_by(reply)
+            # Per-turn token usage, so each run shows what prompt caching saved
+            usage = getattr(reply, "usage_metadata", None) or dict()
+            details = usage.get("input_token_details") or dict()
+            if usage:
+                values = dict(values,
+                              input_tokens=usage.get("input_tokens", 0),
+                              cache_read_tokens=details.get("cache_read", 0) or 0,
+                              cache_write_tokens=details.get("cache_creation", 0) or 0)
+        tracking.record(tags=tags, params={"prompt": prompt}, values=values)
+
+    async def process_chat(self, user_id: str, question_id: str, prompt: str) -> Dict[str, Any]:
         """
         Process a chat request and return the response
 
@@ -214,74 +577,62 @@ class ChatHandler:
             Dict containing user_id, question_id, and the markdown response
         """
         try:
+            started = time.perf_counter()
             session_id = self._get_session_id(user_id, question_id)
             logger.debug(f"Processing chat for session {session_id}")
 
-            # Load the problem description from the notebook
-            problem_description = self._load_problem_description(question_id=question_id)
-            # Create the instruction prompt
-            system_prompt = self._create_system_prompt(problem_description=problem_description)
-
-            # Set up MLflow experiment
-            experiment_id = self._get_or_create_experiment(session_id)
-            mlflow.start_run(experiment_id=experiment_id)
+            # Cached instruction prompt with the problem description of the notebook
+            system_prompt = self.get_system_prompt(question_id)
 
-            try:
-                # Get or create session
-                if session_id not in self.chat_sessions:
-                    self.chat_sessions[session_id] = {
-                        'messages': [SystemMessage(content=system_prompt)]
-                    }
-
-                # Create graph for this session
-                graph = self._setup_graph(session_id, system_prompt)
+            conversation = await offloader.run_blocking(self.conversation_store.load, session_id)
+            new_message = HumanMessage(content=prompt)
+            reference = self.retrieve_reference(question_id, prompt)
+            context = self.context_manager.build(system_prompt, conversation, new_message, reference)
 
-                # Create new message
-                new_message = HumanMessage(content=prompt)
-
-                # Stream the response
-                response = None
-                for event in graph.stream(
+            local, source = self._local_response(user_id, question_id, system_prompt, conversation, prompt)
+            if local is not None:
+                reply = AIMessage(content=local)
+                message_count = len(context.messages) + 2
+            else:
+                result = await self.graph.ainvoke(
                     {
-                        "messages": [new_message],
-                        "session_id": session_id
-                    },
-                    config={
-                        "configurable": {
-                            "thread_id": session_id
-                        }
-                    },
-                    stream_mode='values'
-                ):
-                    # Get the last message from the assistant
-                    response = event["messages"][-1].content
-
-                if not response:
-                    raise ValueError("No response generated from the model")
-
-                # Log the interaction
-                mlflow.log_params({
-                    "user_id": user_id,
-                    "question_id": question_id,
-                    "prompt": prompt,
-                    "llm_provider": LLM_PROVIDER
-                })
-                mlflow.log_metrics({
-                    "message_count": len(self.chat_sessions[session_id]['messages'])
-                })
-
-                logger.debug(f"Successfully generated response for session {session_id}")
-
-                return {
-                    "user_id": user_id,
-                    "question_id": question_id,
-                    "response": response,
-                    "llm_provider": LLM_PROVIDER
-                }
-
-            finally:
-                mlflow.end_run()
+                        "messages": context.messages,
+                        "system_prompt": context.system_prompt,
+                        "summary": context.summary,
+                        "reference": context.reference,
+                        "user_id": user_id
+                    }
+                )
+                messages = result["messages"]
+                reply = messages[-1] if messages else None
+                message_count = len(messages) + 1
+
+            response = reply.content if reply is not None else None
+            if not response:
+                raise ValueError("No response generated from the model")
+            if local is None:
+                self._store_response(question_id, system_prompt, conversation, prompt, self._chunk_text(reply))
+
+            await offloader.run_blocking(self._save_turn, conversation, [new_message, reply])
+            await self.context_manager.fold(conversation, context, self.conversation_store)
+
+            # Log the interaction (the message count includes the system prompt)
+            self._track(session_id, user_id, question_id, prompt, {
+                "message_count": message_count,
+                "latency_seconds": time.perf_counter() - started,
+                "response_cache_hit": float(source == "cache"),
+                "prefiltered": float(source == "prefilter")
+            }, reply=reply if local is None else None)
+
+            logger.debug(f"Successfully generated response for session {session_id}")
+
+            return {
+                "user_id": user_id,
+                "question_id": question_id,
+                "response": response,
+                "llm_provider": LLM_PROVIDER
+            }
 
         except Exception as e:
             logger.error(f"Error processing chat: {str(e)}", exc_info=True)
-            raise
\ No newline at end of file
+            raise
@@ -0,0 +1,43 @@
+import hashlib
+import re
+from typing import Optional
+
+from utils.cache_utility import LRUCache
+from utils.metrics_utility import metrics
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case, punctuation and whitespace insensitive form of a prompt"""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", prompt.lower())).strip()
+
+
+class ResponseCache(object):
+    """
+    Answers to the opening prompt of a conversation, shared by every candidate on a question.
+
+    Only first turns are cached: later answers depend on the conversation so far. The key holds a
+    digest of the system prompt, so editing a task notebook retires its cached answers.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def _key(question_id: str, system_prompt: str, prompt: str) -> tuple:
+        digest = hashlib.sha256(f"{system_prompt}\0{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+        return question_id, digest
+
+    def get(self, question_id: str, system_prompt: str, prompt: str) -> Optional[str]:
+        response = self._cache.get(self._key(question_id, system_prompt, prompt))
+        metrics.inc(f"chat.response_cache.{'hits' if response is not None else 'misses'}.{question_id}")
+        return response
+
+    def set(self, question_id: str, system_prompt: str, prompt: str, response: str) -> None:
+        self._cache.set(self._key(question_id, system_prompt, prompt), response)
+
+    def stats(self) -> dict:
+        """Size and hit rate over all questions, reported under /metrics"""
+        return self._cache.stats()
@@ -0,0 +1,98 @@
+from typing import Awaitable, Callable, List
+
+from langchain.schema import BaseMessage, HumanMessage
+
+from utils.conversation_utility import Conversation
+from utils.logger_utility import logger
+from utils.offload_utility import offloader
+
+
+class ChatContext(object):
+    """What is sent to the model for one turn"""
+
+    def __init__(self, system_prompt: str, messages: List[BaseMessage], window_start: int, summary: str = "",
+                 reference: str = ""):
+        # Kept apart from the summary and the retrieved notebook cells so that the prompt stays a
+        # stable, cacheable prefix
+        self.system_prompt = system_prompt
+        self.summary = summary
+        self.reference = reference
+        self.messages = messages
+        # Index of the first stored message kept verbatim; older ones belong in the summary
+        self.window_start = window_start
+
+
+class ChatContextManager(object):
+    """
+    Keeps each turn's prompt within a token budget: the system prompt, the rolling summary of older
+    turns and as many of the most recent turns as fit.
+
+    Once the history overflows, the window shrinks to ``fold_ratio`` of the budget, so the turns
+    that fell out are summarized once every few turns rather than on every turn.
+    """
+
+    SUMMARY_HEADER = "-------- CONVERSATION SO FAR --------"
+
+    def __init__(self, token_counter: Callable[[str], int], budget: int, fold_ratio: float,
+                 summarizer: Callable[[str, List[BaseMessage]], Awaitable[str]]):
+        """
+        Args:
+            token_counter: Counts the tokens of a text for the configured provider
+            budget: Maximum number of prompt tokens per turn
+            fold_ratio: Fraction of the budget the window is trimmed to when the history overflows
+            summarizer: Folds messages into the previous summary and returns the new summary
+        """
+        self.token_counter = token_counter
+        self.budget = budget
+        self.fold_ratio = fold_ratio
+        self.summarizer = summarizer
+
+    def _count(self, message: BaseMessage) -> int:
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        # A few tokens of per-message framing (role, separators)
+        return self.token_counter(content) + 4
+
+    @classmethod
+    def summary_block(cls, summary: str) -> str:
+        return f"{cls.SUMMARY_HEADER}\n{summary}\n" if summary else ""
+
+    def build(self, system_prompt: str, conversation: Conversation, new_message: HumanMessage,
+              reference: str = "") -> ChatContext:
+        """Select the messages for the next turn"""
+        history = conversation.since(conversation.summarized_upto)
+        summary = conversation.summary
+        fixed = self.token_counter(system_prompt) + self.token_counter(self.summary_block(summary)) + \
+            self.token_counter(reference) + self._count(new_message)
+
+        costs = [self._count(message) for message in history]
+        if fixed + sum(costs) <= self.budget:
+            return ChatContext(system_prompt, history + [new_message], conversation.summarized_upto, summary,
+                               reference)
+
+        # Over budget: keep the most recent whole turns that fit into the reduced window
+        available = self.budget * self.fold_ratio - fixed
+        start = len(history)
+        used = 0
+        for index in range(len(history) - 1, -1, -1):
+            used += costs[index]
+            if used > available:
+                break
+            if isinstance(history[index], HumanMessage):
+                start = index
+
+        logger.debug(f"Context of {conversation.session_id} over budget, keeping {len(history) - start} "
+                     f"of {len(history)} unsummarized messages")
+        return ChatContext(system_prompt, history[start:] + [new_message], conversation.summarized_upto + start,
+                           summary, reference)
+
+    async def fold(self, conversation: Conversation, context: ChatContext, store) -> None:
+        """Summarize the turns that fell out of the window and store the new rolling summary"""
+        if context.window_start <= conversation.summarized_upto:
+            return
+        dropped = conversation.since(conversation.summarized_upto, context.window_start)
+        try:
+            summary = await self.summarizer(conversation.summary, dropped)
+            await offloader.run_blocking(store.set_summary, conversation.session_id, summary, context.window_start)
+        except Exception as e:
+            # Retried on a later turn; until then the dropped turns are simply left out
+            logger.warning(f"Failed to summarize conversation {conversation.session_id}: {str(e)}")
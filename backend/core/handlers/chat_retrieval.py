@@ -0,0 +1,111 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9_]+")
+_HEADING = re.compile(r"^(?=#{1,6}\s)", re.MULTILINE)
+_RULE = re.compile(r"^\s*-{3,}\s*$", re.MULTILINE)
+STOPWORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i", "if", "in",
+    "is", "it", "me", "my", "of", "on", "or", "should", "so", "that", "the", "this", "to", "what", "when",
+    "which", "with", "you", "your"
+))
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _is_placeholder(source: str) -> bool:
+    """A code cell without code, e.g. the "# YOUR RESPONSE STARTS FROM HERE" marker of the task notebooks"""
+    return all(not line.strip() or line.strip().startswith("#") for line in source.splitlines())
+
+
+def markdown_sections(source: str) -> List[str]:
+    """A markdown text split at its headings, without ``---`` rules"""
+    sections = [_RULE.sub("", section).strip() for section in _HEADING.split(source)]
+    return [section for section in sections if section]
+
+
+def _has_body(section: str) -> bool:
+    # A lone heading carries nothing worth retrieving
+    return not section.startswith("#") or "\n" in section
+
+
+def section_title(section: str) -> str:
+    return section.splitlines()[0].lstrip("#").strip().lower() if section.startswith("#") else ""
+
+
+def split_description(description: str, prompt_sections) -> Tuple[str, List[str]]:
+    """
+    Split a problem description into the part kept in the system prompt and retrievable sections
+
+    Args:
+        description: The markdown problem description
+        prompt_sections: Titles (case insensitive) of the sections kept in the prompt; empty to keep
+            the whole description
+    """
+    titles = {title.strip().lower() for title in prompt_sections if title.strip()}
+    if not titles:
+        return description, list()
+    kept, retrievable = list(), list()
+    for section in markdown_sections(description):
+        # The text before the first "##" heading (the title) is always kept
+        if not section.startswith("##") or section_title(section) in titles:
+            kept.append(section)
+        elif _has_body(section):
+            retrievable.append(section)
+    return "\n\n".join(kept), retrievable
+
+
+def notebook_passages(notebook: Dict, skip: int = 0, max_chars: int = 1500) -> List[str]:
+    """
+    Retrievable passages of a notebook: code cells whole, markdown cells split at their headings
+
+    Args:
+        notebook: The parsed .ipynb document
+        skip: Number of leading cells left out (already part of the system prompt)
+        max_chars: Passages are cut to this length
+    """
+    passages = list()
+    for cell in notebook.get("cells", [])[skip:]:
+        source = "".join(cell.get("source", []))
+        if cell.get("cell_type") == "markdown":
+            sections = [section for section in markdown_sections(source) if _has_body(section)]
+        elif _is_placeholder(source):
+            continue
+        else:
+            sections = [f"```python\n{source.strip()}\n```"]
+        passages.extend(section[:max_chars] for section in sections)
+    return passages
+
+
+class PassageIndex(object):
+    """Okapi BM25 index over the passages of one notebook"""
+
+    def __init__(self, passages: List[str], k1: float = 1.5, b: float = 0.75):
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        self._terms = [Counter(tokenize(passage)) for passage in passages]
+        self._lengths = [sum(terms.values()) for terms in self._terms]
+        self._avg_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        document_frequency = Counter(term for terms in self._terms for term in terms)
+        count = len(passages)
+        self._idf = {term: math.log(1 + (count - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+
+    def search(self, query: str, k: int, min_score: float = 0.0) -> List[str]:
+        """Up to ``k`` passages scoring above ``min_score`` for the query, best first"""
+        query_terms = set(tokenize(query)) & self._idf.keys()
+        if not query_terms or k <= 0:
+            return list()
+        scores = list()
+        for index, terms in enumerate(self._terms):
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[index] / (self._avg_length or 1))
+            score = sum(self._idf[term] * terms[term] * (self.k1 + 1) / (terms[term] + norm)
+                        for term in query_terms if term in terms)
+            if score > min_score:
+                scores.append((score, index))
+        scores.sort(reverse=True)
+        return [self.passages[index] for _, index in scores[:k]]
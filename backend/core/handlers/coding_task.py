@@ -6,6 +6,7 @@ from typing import Optional, Dict
 from utils.postgres_utility import PostgresClient
 from utils.git_utility import get_git_provider
 from utils.logger_utility import logger
+from utils.offload_utility import offloader
 
 
 class CodingTaskHandler:
@@ -108,13 +109,14 @@ class CodingTaskHandler:
             
             # Create or get branch for user
             branch_name = f"user-{user_id}"
-            self.git_provider.ensure_branch_exists(branch_name)
+            await offloader.run_blocking(self.git_provider.ensure_branch_exists, branch_name)
             
             # Commit files if provided
             if solution_file:
                 solution_content = await solution_file.read()
                 file_path = f"{question_id}/{question_id}.csv"
-                self.git_provider.commit_file(
+                await offloader.run_blocking(
+                    self.git_provider.commit_file,
                     branch_name=branch_name,
                     file_path=file_path,
                     content=solution_content,
@@ -124,7 +126,8 @@ class CodingTaskHandler:
             if notebook_file:
                 notebook_content = await notebook_file.read()
                 file_path = f"{question_id}/{question_id}.ipynb"
-                self.git_provider.commit_file(
+                await offloader.run_blocking(
+                    self.git_provider.commit_file,
                     branch_name=branch_name,
                     file_path=file_path,
                     content=notebook_content,
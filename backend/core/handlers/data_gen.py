@@ -1,190 +1,191 @@
+import hashlib
 import os
 import random
 import shutil
+import time
 import pandas as pd
 import numpy as np
-from random import shuffle
+from constants.configurations import ARTIFACT_CACHE_ENABLED
+from utils.artifact_cache_utility import artifact_cache
 from utils.common_utils import CommonUtils
 from utils.logger_utility import logger
 
+# Part of every artifact cache key: bump it whenever a generator's output changes
+GENERATOR_VERSION = 3
+# Arguments each coding task's artifacts depend on, besides its reference notebook
+TASK_INPUTS = {
+    "coding_task_1": (),
+    "coding_task_2": ("seed", "num_samples"),
+    "coding_task_3": ("seed", "num_samples"),
+    "coding_task_4": ("seed", "num_samples", "distance_constraint")
+}
+
+# Columns of coding task 2; a new spectrum only needs an entry here
+SPECTRA = [
+    {"column": "lum_data", "labels": ['Violet', 'Indigo', 'Blue', 'Green', 'Yellow', 'Orange', 'Red'],
+     "value_range": (-750, 750)},
+    {"column": "xray_data", "labels": ['X1', 'X2', 'X3', 'X4', 'X5', 'X6', 'X7'], "value_range": (-100, 100)},
+    {"column": "gamma_data", "labels": ['G1', 'G2', 'G3', 'G4', 'G5', 'G6', 'G7'], "value_range": (-10, 10)}
+]
+
 
 class DataGen(object):
     def __init__(self, seed: int = 1729):
         self.seed = seed
 
-    def sample_means_and_stds(self, value_range, num_means):
+    def sample_means_and_stds(self, value_range, num_means, block_size=256, max_attempts=20000):
         """
         Sample means and standard deviations from a specified range.
 
+        Candidates are drawn in blocks and a candidate is accepted when its mean is at least three
+        of its standard deviations away from every accepted mean. After ``max_attempts`` candidates
+        the means are placed evenly across the range instead, so the time spent is bounded.
+
         Parameters:
-        - seed (int): Random seed for reproducibility.
         - value_range (tuple): Range of values (min, max) for means.
         - num_means (int): Number of means to sample.
+        - block_size (int): Number of candidates drawn at once.
+        - max_attempts (int): Maximum number of candidates drawn before falling back.
 
         Returns:
-        - means (ndarray): Sampled means.
-        - std_devs (ndarray): Sampled standard deviations based on means.
+        - means (list): Sampled means.
+        - std_devs (list): Sampled standard deviations based on means.
         """
-        np.random.seed(self.seed)
-
-        means = []
-        std_devs = []
-
-        while len(means) < num_means:
-            mean = np.random.uniform(value_range[0], value_range[1])
-            std_dev = np.random.uniform(0.3, 0.6 * abs(mean))
-
-            if all(abs(mean - m) >= 3 * std_dev for m in means):
-                means.append(mean)
-                std_devs.append(std_dev)
-
-        return means, std_devs
+        started = time.perf_counter()
+        rng = np.random.default_rng(self.seed)
 
-    def generate_multi_modal_normal(self, value_range, num_modes, mean, std_dev, num_samples=7000):
+        means = np.empty(0)
+        std_devs = np.empty(0)
+        attempts = 0
+
+        while len(means) < num_means and attempts < max_attempts:
+            size = min(block_size, max_attempts - attempts)
+            attempts += size
+            candidate_means = rng.uniform(value_range[0], value_range[1], size=size)
+            candidate_stds = rng.uniform(0.3, 0.6 * np.abs(candidate_means))
+
+            # Accept in draw order; each acceptance only narrows the room for the later candidates
+            while len(candidate_means) and len(means) < num_means:
+                if len(means):
+                    gaps = np.abs(candidate_means[:, None] - means[None, :]).min(axis=1)
+                    accepted = np.flatnonzero(gaps >= 3 * candidate_stds)
+                else:
+                    accepted = np.arange(len(candidate_means))
+                if not len(accepted):
+                    break
+                index = accepted[0]
+                means = np.append(means, candidate_means[index])
+                std_devs = np.append(std_devs, candidate_stds[index])
+                candidate_means = candidate_means[index + 1:]
+                candidate_stds = candidate_stds[index + 1:]
+
+        if len(means) < num_means:
+            logger.warning(f"Placing {num_means} means evenly in {value_range} after {attempts} attempts "
+                           f"({time.perf_counter() - started:.4f}s)")
+            spacing = (value_range[1] - value_range[0]) / (num_means + 1)
+            means = value_range[0] + spacing * np.arange(1, num_means + 1)
+            std_devs = np.full(num_means, spacing / 3)
+        else:
+            logger.debug(f"Sampled {num_means} means in {value_range} after {attempts} attempts "
+                         f"({time.perf_counter() - started:.4f}s)")
+
+        return means.tolist(), std_devs.tolist()
+
+    def simulate_spectra(self, num_samples=1000, spectra=None):
         """
-        Generate a multi-modal normal distribution.
+        Simulate several multi-modal spectra side by side.
+
+        Every spectrum is a column of one preallocated array, filled category by category in the
+        order of its labels; the first ``num_samples % len(labels)`` categories get one extra sample.
+        All categories of a spectrum scale the same standard normal draw from the global generator
+        seeded with ``self.seed``, so the data is reproducible from the seed.
 
         Parameters:
-        - seed (int): Random seed for reproducibility.
-        - value_range (tuple): Range of values (min, max).
-        - num_modes (int): Number of modes in the distribution.
-        - means (list): List of means for each mode.
-        - std_devs (list): List of standard deviations for each mode.
-        - num_samples (int): Number of samples to generate.
+        - num_samples (int): Number of samples per spectrum.
+        - spectra (list): Dicts with the column name, category labels and value range of each
+          spectrum, SPECTRA by default.
 
         Returns:
-        - samples (ndarray): Generated samples from the multi-modal normal distribution.
+        - data (ndarray): Samples of shape (num_samples, len(spectra)).
+        - params (dict): Means and standard deviations of every spectrum by column name.
         """
-        np.random.seed(self.seed)
-        samples = np.random.normal(loc=mean, scale=std_dev, size=num_samples)
-        # Clip samples to the specified range
-        # samples = np.clip(samples, value_range[0], value_range[1])
-        return samples
+        spectra = SPECTRA if spectra is None else spectra
+        data = np.empty((num_samples, len(spectra)))
+        params = dict()
+        for column, spectrum in enumerate(spectra):
+            labels = list(spectrum["labels"])
+            means, std_devs = self.sample_means_and_stds(spectrum["value_range"], len(labels))
+            quotient, remainder = divmod(num_samples, len(labels))
+
+            np.random.seed(self.seed)
+            z = np.random.standard_normal(quotient + (remainder > 0))
+            offset = 0
+            for i in range(len(labels)):
+                count = quotient + (i < remainder)
+                data[offset:offset + count, column] = means[i] + std_devs[i] * z[:count]
+                offset += count
+            params[spectrum["column"]] = {"means": means, "std_devs": std_devs}
+
+        return data, params
 
     @staticmethod
-    def distribute_sample_across_categories(num_samples, categories):
-        category_samples = dict()
-        num_categories = len(categories)
-        divisor = num_samples % num_categories
-        new_num_samples = num_samples - divisor
-        # print(new_num_samples)
-        quotient = int(new_num_samples / num_categories)
-        # print(quotient)
-        shuffle(categories)
-        # print(categories)
-        for c in categories:
-            category_samples[c] = quotient
-            if divisor == 0:
-                continue
-            category_samples[c] += 1
-            divisor -= 1
-        return category_samples
-
-    def simulate_luminescence_vibgyor(self, num_samples=1000):
-        colors = ['Violet', 'Indigo', 'Blue', 'Green', 'Yellow', 'Orange', 'Red']
-        value_range = (-750, 750)  # Define a range for luminescence values
-        num_means = len(colors)
-
-        # Sample means and standard deviations
-        means, std_devs = self.sample_means_and_stds(value_range, num_means)
-        # logger.debug(means, std_devs)
-
-        # Distribute samples across categories
-        category_samples = self.distribute_sample_across_categories(num_samples, colors)
-        # print(category_samples)
-
-        # Generate multi-modal normal distribution for luminescence values
-        luminescence_data = {}
-        for i, color in enumerate(colors):
-            # print(f"==={color}")
-            # print(category_samples[color])
-            luminescence_data[color] = self.generate_multi_modal_normal(value_range, num_means, means[i],
-                                                                        std_devs[i],
-                                                                        category_samples[color])
-            # print(len(luminescence_data[color]))
-
-        return luminescence_data, means, std_devs
-
-    def simulate_xray(self, num_samples=1000):
-        colors = ['X1', 'X2', 'X3', 'X4', 'X5', 'X6', 'X7']
-        value_range = (-100, 100)  # Define a range for luminescence values
-        num_means = len(colors)
-
-        # Sample means and standard deviations
-        means, std_devs = self.sample_means_and_stds(value_range, num_means)
-        # print(means, std_devs)
-
-        # Distribute samples across categories
-        category_samples = self.distribute_sample_across_categories(num_samples, colors)
-
-        # Generate multi-modal normal distribution for luminescence values
-        xray_data = {}
-        for i, color in enumerate(colors):
-            xray_data[color] = self.generate_multi_modal_normal(value_range, num_means, means[i], std_devs[i],
-                                                                category_samples[color])
-
-        return xray_data, means, std_devs
-
-    def simulate_gamma(self, num_samples=1000):
-        colors = ['G1', 'G2', 'G3', 'G4', 'G5', 'G6', 'G7']
-        value_range = (-10, 10)  # Define a range for luminescence values
-        num_means = len(colors)
-
-        # Sample means and standard deviations
-        means, std_devs = self.sample_means_and_stds(value_range, num_means)
-        # print(means, std_devs)
-
-        # Distribute samples across categories
-        category_samples = self.distribute_sample_across_categories(num_samples, colors)
-
-        # Generate multi-modal normal distribution for luminescence values
-        gamma_data = {}
-        for i, color in enumerate(colors):
-            gamma_data[color] = self.generate_multi_modal_normal(value_range, num_means, means[i], std_devs[i],
-                                                                 category_samples[color])
-
-        return gamma_data, means, std_devs
+    def spatial_hash(points):
+        """Hash of quantized (integer) 3D points; equal points always share a hash"""
+        return (points[:, 0] * 73856093) ^ (points[:, 1] * 19349663) ^ (points[:, 2] * 83492791)
 
     def assign_random_coordinates(self, df, distance_constraint=5.0, max_retries=10000):
-        rng = np.random.default_rng(self.seed)
-        coords = [(0.0, 0.0, 0.0)]  # Start with Earth
-        coord_set = set(coords)
+        """
+        Grow a cloud of unique coordinates from Earth at the origin, each new planet offset from an
+        existing one by at most ``distance_constraint``.
 
-        n = len(df)
-        retries = 0
-        limit = distance_constraint / np.sqrt(3)
+        Coordinates are kept in integer units of 0.001 and proposed in blocks: every block draws
+        parents among the planets placed so far and grows the cloud by at most an eighth. Planets of
+        a block cannot parent each other, which makes the tree slightly shallower than placing them
+        one by one (mean depth about 0.94 ln n instead of ln n; doubling blocks would give 0.72 ln n).
+        Duplicates are rejected through a spatial hash; a hash collision only rejects a valid proposal.
 
-        while len(coords) <= n and retries < max_retries:
-            retries += 1
+        Parameters:
+        - df (DataFrame): Planets to place, one row per planet.
+        - distance_constraint (float): Maximum distance between a planet and its parent.
+        - max_retries (int): Maximum number of rejected proposals.
 
-            # Pick a random existing coordinate
-            origin = coords[rng.integers(0, len(coords))]
+        Returns:
+        - df (DataFrame): The planets with x, y and z columns.
+        """
+        rng = np.random.default_rng(self.seed)
+        n = len(df)
+        # Per-axis offset bound in 0.001 units; rounded down so the diagonal stays within the constraint
+        limit = int(np.floor(distance_constraint / np.sqrt(3) * 1000))
+        if limit < 1:
+            raise RuntimeError("Could not generate enough valid coordinates. Try increasing distance_constraint.")
 
-            # Sample x, y, z offset within constraint cube
-            dx = round(rng.uniform(-limit, limit), 3)
-            dy = round(rng.uniform(-limit, limit), 3)
-            dz = round(rng.uniform(-limit, limit), 3)
+        coords = np.zeros((n + 1, 3), dtype=np.int64)  # Start with Earth
+        seen = self.spatial_hash(coords[:1])
+        count = 1
+        rejected = 0
 
-            new_coord = (
-                round(origin[0] + dx, 3),
-                round(origin[1] + dy, 3),
-                round(origin[2] + dz, 3)
-            )
+        while count <= n and rejected <= max_retries:
+            block = min(n + 1 - count, max(1, count // 8))
+            parents = coords[rng.integers(0, count, size=block)]
+            candidates = parents + rng.integers(-limit, limit, size=(block, 3), endpoint=True)
 
-            if new_coord in coord_set:
-                continue  # Duplicate
+            hashes = self.spatial_hash(candidates)
+            _, first = np.unique(hashes, return_index=True)
+            first.sort()
+            fresh = first[~np.isin(hashes[first], seen)]
 
-            # This coordinate is guaranteed to be within distance_constraint
-            coords.append(new_coord)
-            coord_set.add(new_coord)
+            coords[count:count + len(fresh)] = candidates[fresh]
+            seen = np.union1d(seen, hashes[fresh])
+            count += len(fresh)
+            rejected += block - len(fresh)
 
-        if len(coords) < n:
+        if count <= n:
             raise RuntimeError("Could not generate enough valid coordinates. Try increasing distance_constraint.")
 
-        # Assign to DataFrame
-        df['x'] = [c[0] for c in coords[1:]]  # Skip Earth (already handled)
-        df['y'] = [c[1] for c in coords[1:]]
-        df['z'] = [c[2] for c in coords[1:]]
+        # Assign to DataFrame, skipping Earth
+        df['x'] = coords[1:, 0] / 1000
+        df['y'] = coords[1:, 1] / 1000
+        df['z'] = coords[1:, 2] / 1000
 
         return df
 
@@ -233,43 +234,69 @@ class DataGen(object):
             "Liveable": is_liveable
         }
 
+    @staticmethod
+    def generate_planet_batch(rng, size: int) -> dict:
+        """
+        Vectorized ``generate_planet_sample``: draws ``size`` planets at once.
+
+        Returns:
+        - columns (dict): Arrays for Rock, Water, Air, Fire, Ether, Liveability and Liveable.
+        """
+        ether = np.clip(rng.beta(1, 20, size=size), 0.001, 0.05)
+
+        rock_noise = (1 - ether * 20) * 0.1
+        rock = np.clip(rng.normal(loc=0.3, scale=rock_noise), 0.1, 0.6)
+
+        ideal_water = -4 * (rock - 0.4) ** 2 + 0.5
+        water_noise = (1 - ether * 15) * 0.05
+        water = np.clip(ideal_water + rng.normal(0, water_noise), 0.05, 0.5)
+
+        air = 0.5 * (rock * water) + 0.2 * np.sqrt(ether)
+        air = np.clip(air + rng.normal(0, 0.02 * (1 - ether * 10)), 0.05, 0.4)
+
+        fire = np.maximum(0.0, 1.0 - (rock + water + air) - ether)
+
+        scale = (1.0 - ether) / (rock + water + air + fire)
+        rock, water, air, fire = rock * scale, water * scale, air * scale, fire * scale
+
+        # Liveability score
+        liveability = (
+                0.35 * np.exp(-((rock - 0.3) ** 2) / 0.02) +
+                0.3 * np.exp(-((water - 0.4) ** 2) / 0.02) +
+                0.2 * air -
+                0.5 * fire ** 2 +
+                0.1 * np.sqrt(ether)
+        )
+        liveability = np.clip(liveability, 0, 1)
+
+        return {
+            "Rock": np.round(rock, 3),
+            "Water": np.round(water, 3),
+            "Air": np.round(air, 3),
+            "Fire": np.round(fire, 3),
+            "Ether": np.round(ether, 4),
+            "Liveability": np.round(liveability, 3),
+            "Liveable": np.where(liveability > 0.65, "Yes", "No")
+        }
+
     def generate_solar_system_with_ether(self, num_planets: int) -> pd.DataFrame:
         rng = np.random.default_rng(self.seed)
 
         required_liveable = max(1, int(num_planets * 0.05))
-
-        liveable_list = []
-        non_liveable_list = []
-
         liveable_attempts = 3000
-        general_attempts = num_planets * 2
-
-        # 1. Ensure minimum liveable planets
-        while len(liveable_list) < required_liveable and liveable_attempts > 0:
-            planet = self.generate_planet_sample(rng)
-            if planet["Liveable"] == "Yes":
-                liveable_list.append(planet)
-            liveable_attempts -= 1
-
-        # 2. Fill the rest of the dataset
-        while len(liveable_list) + len(non_liveable_list) < num_planets and general_attempts > 0:
-            planet = self.generate_planet_sample(rng)
-            if planet["Liveable"] == "Yes":
-                if len(liveable_list) < required_liveable:
-                    liveable_list.append(planet)
-                else:
-                    non_liveable_list.append(planet)
-            else:
-                non_liveable_list.append(planet)
-            general_attempts -= 1
 
-        all_planets = liveable_list + non_liveable_list
-        shuffle(all_planets)
+        # 1. Ensure minimum liveable planets: the first liveable draws out of the attempt budget
+        candidates = self.generate_planet_batch(rng, liveable_attempts)
+        liveable_index = np.flatnonzero(candidates["Liveable"] == "Yes")[:required_liveable]
+        liveable = {column: values[liveable_index] for column, values in candidates.items()}
 
-        for i, planet in enumerate(all_planets):
-            planet["Planet"] = f"Planet_{i + 1}"
+        # 2. Fill the rest of the dataset; every draw is accepted from here on
+        rest = self.generate_planet_batch(rng, max(0, num_planets - len(liveable_index)))
 
-        return pd.DataFrame(all_planets)
+        order = rng.permutation(num_planets)
+        columns = {column: np.concatenate([liveable[column], rest[column]])[order] for column in liveable}
+        columns["Planet"] = np.char.add("Planet_", np.arange(1, num_planets + 1).astype(str))
+        return pd.DataFrame(columns)
 
 
 class PrepareCodingTask(DataGen):
@@ -301,28 +328,8 @@ class PrepareCodingTask(DataGen):
                         dst=os.path.join(dst_path, f"{folder_name}.ipynb"))
             this_path = os.path.join(self.path, folder_name, f"{folder_name}.csv")
 
-            luminescence_values, means, std_devs = self.simulate_luminescence_vibgyor(num_samples)
-            luminescence_data = list()
-
-            for k, v in luminescence_values.items():
-                luminescence_data.extend(v)
-
-            xray_values, means, std_devs = self.simulate_xray(num_samples)
-            xray_data = list()
-
-            for k, v in xray_values.items():
-                xray_data.extend(v)
-
-            gamma_values, means, std_devs = self.simulate_gamma(num_samples)
-            gamma_data = list()
-
-            for k, v in gamma_values.items():
-                gamma_data.extend(v)
-
-            full_data = pd.DataFrame(columns=["lum_data", "xray_data", "gamma_data"])
-            full_data["lum_data"] = luminescence_data
-            full_data["xray_data"] = xray_data
-            full_data["gamma_data"] = gamma_data
+            data, _ = self.simulate_spectra(num_samples)
+            full_data = pd.DataFrame(data, columns=[spectrum["column"] for spectrum in SPECTRA])
             full_data.to_csv(this_path, index=False)
             self._cu_.zip_files(dst_path,
                                 os.path.join(self.path, f"{folder_name}.zip"))
@@ -364,3 +371,36 @@ class PrepareCodingTask(DataGen):
         self._cu_.zip_files(dst_path,
                             os.path.join(self.path, f"{folder_name}.zip"))
         return target_planet
+
+
+def artifact_params(task_id: str, ref_path: str, seed: int = 1729, **kwargs) -> dict:
+    """
+    Everything the artifacts of a coding task are generated from, as the key of the artifact cache.
+
+    Only the arguments the task reads are kept, so that e.g. the distance constraint does not
+    split the cached datasets of tasks that ignore it.
+    """
+    folder_name = task_id.replace("_", "-")
+    with open(os.path.join(ref_path, folder_name, f"{folder_name}.ipynb"), "rb") as notebook:
+        notebook_digest = hashlib.blake2b(notebook.read(), digest_size=16).hexdigest()
+    arguments = dict(kwargs, seed=seed)
+    params = {"task_id": task_id, "version": GENERATOR_VERSION, "notebook": notebook_digest}
+    for name in TASK_INPUTS.get(task_id, sorted(arguments)):
+        params[name] = arguments.get(name)
+    return params
+
+
+def prepare_coding_task(task_id: str, ref_path: str, path: str, seed: int = 1729, **kwargs):
+    """
+    Generate the artifacts of a single coding task, or link them from the artifact cache.
+
+    Module level so that it can be executed in a worker process of the offload process pool.
+    """
+    def generate(out_path):
+        prep_obj = PrepareCodingTask(ref_path=ref_path, path=out_path, seed=seed)
+        return getattr(prep_obj, task_id)(**kwargs)
+
+    if not ARTIFACT_CACHE_ENABLED:
+        return generate(path)
+    params = artifact_params(task_id, ref_path, seed, **kwargs)
+    return artifact_cache.get_or_create(artifact_cache.key(**params), path, generate, params)
@@ -0,0 +1,52 @@
+import time
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from constants.constants import ResponseStates
+from utils.admission_utility import AdmissionController, AdmissionRejected
+from utils.logger_utility import logger
+
+
+class AdmissionMiddleware(BaseHTTPMiddleware):
+    """
+    Smooths the login and start-assessment storm at exam start. Requests beyond the route's
+    token bucket or the provisioning queue get their queue position and a Retry-After header
+    instead of piling up until they time out.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.controller = AdmissionController()
+
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path
+        if request.method == "OPTIONS" or not self.controller.is_controlled(path):
+            return await call_next(request)
+
+        try:
+            holds_slot = await self.controller.admit(path)
+        except AdmissionRejected as e:
+            logger.warning(f"Admission rejected for {path} at queue position {e.queue_position}")
+            return JSONResponse(
+                status_code=e.status_code,
+                headers={"Retry-After": str(e.retry_after)},
+                content={
+                    "status": ResponseStates.WARNING,
+                    "message": e.message,
+                    "body": {
+                        "queue_position": e.queue_position,
+                        "retry_after": e.retry_after
+                    }
+                }
+            )
+
+        if not holds_slot:
+            return await call_next(request)
+
+        started = time.monotonic()
+        try:
+            return await call_next(request)
+        finally:
+            self.controller.release(time.monotonic() - started)
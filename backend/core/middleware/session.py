@@ -0,0 +1,59 @@
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from constants.configurations import SESSION_ENFORCE
+from constants.constants import ResponseStates, Routes
+from exceptions.session import InvalidSessionError
+from utils.session_utility import SessionTokenManager
+from utils.logger_utility import logger
+
+
+class SessionMiddleware(BaseHTTPMiddleware):
+    """
+    Verifies the bearer session token issued by /auth/verify and exposes its claims as
+    ``request.state.session``. Verification is in-process, so no database round-trip is needed
+    to identify the caller. Unless enforcing, a missing or invalid token lets the request through
+    without a session.
+    """
+
+    PUBLIC_PREFIXES = (Routes.AUTH, "/metrics", "/docs", "/redoc", "/openapi.json")
+
+    def __init__(self, app, enforce: bool = SESSION_ENFORCE):
+        super().__init__(app)
+        self.enforce = enforce
+        self.token_manager = SessionTokenManager()
+
+    async def dispatch(self, request: Request, call_next):
+        request.state.session = None
+        if request.method == "OPTIONS" or request.url.path.startswith(self.PUBLIC_PREFIXES):
+            return await call_next(request)
+
+        authorization = request.headers.get("Authorization", "")
+        token = authorization[7:] if authorization.lower().startswith("bearer ") else None
+
+        if token:
+            try:
+                request.state.session = self.token_manager.verify(token)
+            except InvalidSessionError as e:
+                if self.enforce:
+                    logger.warning(f"Rejected session token for {request.url.path}: {e.message}")
+                    return self._reject(e)
+                # Not enforcing: a token signed by another worker or before a restart counts as missing
+                logger.info(f"Ignored invalid session token for {request.url.path}: {e.message}")
+                request.state.session = None
+        elif self.enforce:
+            return self._reject(InvalidSessionError("Session token is required"))
+
+        return await call_next(request)
+
+    @staticmethod
+    def _reject(exc: InvalidSessionError) -> JSONResponse:
+        return JSONResponse(
+            status_code=exc.status_code,
+            content={
+                "status": ResponseStates.FAILED,
+                "message": exc.message,
+                "body": None
+            }
+        )
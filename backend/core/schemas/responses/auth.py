@@ -5,7 +5,7 @@ from typing import Optional, Dict, Any
 class AuthResponse(BaseModel):
     status: str
     message: str
-    body: Dict[str, Any]  # Will contain authenticated, user_id, assessment_status, and assessment_start_time
+    body: Dict[str, Any]  # Will contain authenticated, user_id, assessment_status, assessment_start_time and session_token
 
 
 class CaptchaResponse(BaseModel):
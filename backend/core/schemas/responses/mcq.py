@@ -28,3 +28,4 @@ class NextQuestionResponse(DefaultResponse):
 
 class StartAssessmentResponse(DefaultResponse):
     body: Optional[List[NextQuestionResponseModel]] = None
+    session_token: Optional[str] = None  # Refreshed token carrying the assessment start time
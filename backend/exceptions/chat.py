@@ -0,0 +1,38 @@
+from typing import Optional
+
+
+class ChatException(Exception):
+    """Base exception for the chat module"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        self.message = message
+        self.status_code = status_code
+        super().__init__(self.message)
+
+
+class ConversationConflictError(ChatException):
+    """Raised when a conversation was appended to by another worker since it was loaded"""
+
+    def __init__(self, message: str = "Conversation was modified concurrently"):
+        super().__init__(message=message, status_code=409)
+
+
+class MockProviderError(ChatException):
+    """Injected by the mock LLM provider to simulate a throttled or failing upstream"""
+
+    def __init__(self, status_code: int = 500):
+        super().__init__(message=f"Mock LLM provider returned {status_code}", status_code=status_code)
+
+
+class LLMQueueTimeoutError(ChatException):
+    """Raised when an LLM call could not start within its queueing deadline"""
+
+    def __init__(self, message: str = "The assistant is busy, please try again in a moment"):
+        super().__init__(message=message, status_code=503)
+
+
+class UnknownQuestionError(ChatException):
+    """Raised for a question without a coding task notebook"""
+
+    def __init__(self, question_id: str):
+        super().__init__(message=f"Unknown question {question_id}", status_code=404)
@@ -1,6 +1,7 @@
 from fastapi import Request
 from fastapi.responses import JSONResponse
 from .mcq import MCQException, NoQuestionsAvailableError
+from .session import SessionException
 from constants.constants import ResponseStates
 from utils.logger_utility import logger
 
@@ -23,4 +24,19 @@ async def mcq_exception_handler(request: Request, exc: MCQException):
             "message": str(exc),
             "body": None
         }
-    ) 
\ No newline at end of file
+    )
+
+
+async def session_exception_handler(request: Request, exc: SessionException):
+    """
+    Handles session token errors raised while resolving the acting user
+    """
+    logger.warning(f"Session error on {request.url.path}: {str(exc)}")
+    return JSONResponse(
+        status_code=exc.status_code or 401,
+        content={
+            "status": ResponseStates.FAILED,
+            "message": str(exc),
+            "body": None
+        }
+    )
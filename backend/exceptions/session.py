@@ -0,0 +1,24 @@
+from typing import Optional
+
+
+class SessionException(Exception):
+    """Base exception for session handling"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        self.message = message
+        self.status_code = status_code
+        super().__init__(self.message)
+
+
+class InvalidSessionError(SessionException):
+    """Raised when a session token is missing, tampered with or expired"""
+
+    def __init__(self, message: str = "Invalid session token"):
+        super().__init__(message=message, status_code=401)
+
+
+class SessionUserMismatchError(SessionException):
+    """Raised when the user in the request does not match the user of the session"""
+
+    def __init__(self, message: str = "Request user does not match the session"):
+        super().__init__(message=message, status_code=403)
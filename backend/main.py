@@ -4,24 +4,64 @@ if __name__ == "__main__":
     load_dotenv("dev-variables.env")
 
 import multiprocessing
+from contextlib import asynccontextmanager
 import uvicorn
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 from constants.configurations import FAST_SERVICE_PORT, SERVICE_HOST
 from core.apis import router
+from core.dependencies import build_handlers
 from utils.logger_utility import logger
+from utils.http_utility import AsyncHTTPClient
+from utils.offload_utility import offloader, EventLoopLagMonitor
+from utils.tracking_utility import tracking
+from utils.mongo_utility import MongoDBClient
+from utils.postgres_utility import PostgresClient
 from exceptions.mcq import MCQException
-from exceptions.handlers import mcq_exception_handler
+from exceptions.session import SessionException
+from exceptions.handlers import mcq_exception_handler, session_exception_handler
+from core.middleware.session import SessionMiddleware
+from utils.session_utility import SessionTokenManager
+from core.middleware.admission import AdmissionMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the app-lifetime handlers and clients once, and release them on shutdown"""
+    logger.info("Initializing handlers")
+    # Fails start-up when sessions are enforced without a configured secret
+    SessionTokenManager()
+    build_handlers(app.state)
+    lag_monitor = EventLoopLagMonitor()
+    lag_monitor.start()
+
+    yield
+
+    logger.info("Shutting down, closing clients")
+    await lag_monitor.stop()
+    offloader.shutdown()
+    tracking.stop()
+    await AsyncHTTPClient().close()
+    if MongoDBClient._instance is not None:
+        MongoDBClient().close()
+    if PostgresClient._instance is not None:
+        PostgresClient().close()
 
 
 class FastAPIServices:
     @staticmethod
     def fast_api():
-        app = FastAPI()
+        app = FastAPI(lifespan=lifespan)
         app.include_router(router)
 
         # Add exception handlers
         app.add_exception_handler(MCQException, mcq_exception_handler)
+        app.add_exception_handler(SessionException, session_exception_handler)
+
+        # Registered before CORS so that CORS stays the outermost layer;
+        # admission runs first so rejected requests never reach session verification
+        app.add_middleware(SessionMiddleware)
+        app.add_middleware(AdmissionMiddleware)
 
         app.add_middleware(
             CORSMiddleware,
@@ -0,0 +1,213 @@
+import asyncio
+import math
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from constants.configurations import (
+    ADMISSION_RATE_LIMITS,
+    ADMISSION_MAX_WAIT_SECONDS,
+    ADMISSION_MAX_PROVISIONING,
+    ADMISSION_PROVISIONING_QUEUE,
+    ADMISSION_PROVISIONING_TIMEOUT,
+    ADMISSION_PROVISIONING_ROUTES
+)
+from utils.logger_utility import logger
+from utils.metrics_utility import metrics
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted now; carries the hints returned to the client"""
+
+    def __init__(self, message: str, status_code: int, queue_position: int, retry_after: float):
+        self.message = message
+        self.status_code = status_code
+        self.queue_position = queue_position
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(self.message)
+
+
+class TokenBucket(object):
+    """
+    Token bucket with reservations. A request that finds the bucket empty reserves a future
+    token; its queue position is the number of reservations ahead of it, and it waits until its
+    token has been refilled.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def reserve(self, max_wait: float) -> Tuple[float, int]:
+        """
+        Reserve a token
+
+        Returns:
+            Tuple[float, int]: (seconds to wait before proceeding, queue position)
+
+        Raises:
+            AdmissionRejected: If the wait would exceed max_wait; nothing is reserved in that case
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0, 0
+            position = math.ceil(-self._tokens)
+            wait = -self._tokens / self.rate
+            if wait > max_wait:
+                self._tokens += 1
+                raise AdmissionRejected("Too many requests, please retry shortly",
+                                        status_code=429, queue_position=position, retry_after=wait)
+            return wait, position
+
+    @property
+    def depth(self) -> int:
+        """Number of outstanding reservations"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(0, math.ceil(-self._tokens))
+
+
+class ProvisioningLimiter(object):
+    """Bounds concurrent assessment provisioning and keeps a FIFO of waiting requests"""
+
+    def __init__(self, max_concurrent: int, max_queue: int, timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = None
+
+    def _estimate_wait(self, position: int) -> float:
+        duration = (metrics.timer("admission.provisioning_seconds") or {}).get("avg") or 5.0
+        return duration * math.ceil(position / self.max_concurrent)
+
+    async def acquire(self) -> float:
+        """
+        Wait for a provisioning slot
+
+        Returns:
+            float: Seconds spent waiting
+
+        Raises:
+            AdmissionRejected: If the queue is full or no slot frees up within the timeout
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        position = self.waiting + 1
+        if self.active >= self.max_concurrent and self.waiting >= self.max_queue:
+            raise AdmissionRejected("Assessment provisioning is busy, please retry shortly",
+                                    status_code=503, queue_position=position,
+                                    retry_after=self._estimate_wait(position))
+
+        started = time.monotonic()
+        self.waiting += 1
+        metrics.set_gauge("admission.provisioning_queue_depth", self.waiting)
+        # Not wait_for: a timeout or cancellation landing right after the acquire succeeded would
+        # lose the permit, so the acquire runs in its own task whose outcome is always settled here
+        acquiring = asyncio.ensure_future(self._semaphore.acquire())
+        try:
+            await asyncio.wait({acquiring}, timeout=self.timeout)
+            if not acquiring.done():
+                acquiring.cancel()
+                raise AdmissionRejected("Assessment provisioning is busy, please retry shortly",
+                                        status_code=503, queue_position=self.waiting,
+                                        retry_after=self._estimate_wait(self.waiting))
+        except asyncio.CancelledError:
+            if not acquiring.cancel() and not acquiring.cancelled():
+                # Acquired just before the caller gave up
+                self._semaphore.release()
+            raise
+        finally:
+            self.waiting -= 1
+            metrics.set_gauge("admission.provisioning_queue_depth", self.waiting)
+
+        self.active += 1
+        metrics.set_gauge("admission.provisioning_active", self.active)
+        return time.monotonic() - started
+
+    def release(self, duration: Optional[float] = None) -> None:
+        self.active -= 1
+        metrics.set_gauge("admission.provisioning_active", self.active)
+        if duration is not None:
+            metrics.observe("admission.provisioning_seconds", duration)
+        self._semaphore.release()
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[float, int]]:
+    """Parse ``path:rate:burst`` entries separated by commas"""
+    limits = dict()
+    for entry in filter(None, (e.strip() for e in spec.split(","))):
+        try:
+            path, rate, burst = entry.rsplit(":", 2)
+            limits[path] = (float(rate), int(burst))
+        except ValueError:
+            logger.warning(f"Ignoring malformed admission rate limit entry: {entry}")
+    return limits
+
+
+class AdmissionController:
+    """Per-route token buckets in front of the bounded provisioning limiter"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AdmissionController, cls).__new__(cls)
+            cls._instance.buckets = {path: TokenBucket(rate, burst)
+                                     for path, (rate, burst) in parse_rate_limits(ADMISSION_RATE_LIMITS).items()}
+            cls._instance.provisioning_routes = {r.strip() for r in ADMISSION_PROVISIONING_ROUTES.split(",")
+                                                 if r.strip()}
+            cls._instance.provisioning = ProvisioningLimiter(max_concurrent=ADMISSION_MAX_PROVISIONING,
+                                                             max_queue=ADMISSION_PROVISIONING_QUEUE,
+                                                             timeout=ADMISSION_PROVISIONING_TIMEOUT)
+            logger.debug(f"Admission control enabled for routes: {list(cls._instance.buckets)}")
+        return cls._instance
+
+    def is_controlled(self, path: str) -> bool:
+        return path in self.buckets or path in self.provisioning_routes
+
+    async def admit(self, path: str) -> bool:
+        """
+        Admit a request, waiting for a token and a provisioning slot when needed
+
+        Returns:
+            bool: True if a provisioning slot was taken and must be released with ``release``
+
+        Raises:
+            AdmissionRejected: If the request should be retried later
+        """
+        bucket = self.buckets.get(path)
+        if bucket is not None:
+            try:
+                wait, position = bucket.reserve(max_wait=ADMISSION_MAX_WAIT_SECONDS)
+            except AdmissionRejected:
+                metrics.inc(f"admission.rejected.{path}")
+                raise
+            metrics.set_gauge(f"admission.queue_depth.{path}", bucket.depth)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            metrics.observe(f"admission.wait_seconds.{path}", wait)
+
+        if path not in self.provisioning_routes:
+            return False
+
+        try:
+            waited = await self.provisioning.acquire()
+        except AdmissionRejected:
+            metrics.inc(f"admission.rejected.{path}")
+            raise
+        metrics.observe("admission.provisioning_wait_seconds", waited)
+        return True
+
+    def release(self, duration: float) -> None:
+        self.provisioning.release(duration)
@@ -0,0 +1,215 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from constants.configurations import ARTIFACT_CACHE_DIR, ARTIFACT_CACHE_MAX_BYTES
+from utils.logger_utility import logger
+
+_META = "meta.json"
+# Temporary generation directories older than this are left over by a crashed worker
+_STALE_TMP_SECONDS = 60 * 60
+
+
+class ArtifactCache:
+    """
+    Content-addressed store of generated coding task artifacts.
+
+    An entry is the output directory of one generation, keyed by a digest of everything the
+    generator reads. Entries are built in a temporary directory and published with an atomic
+    rename, so a visible entry is always complete, and a per-key ``flock`` makes concurrent
+    requests for the same key (across workers and replicas sharing the directory) generate it
+    once. Hits are served by hardlinking the entry's files into the candidate's directory, which
+    makes provisioning a repeated key a filesystem operation. The least recently used entries
+    are evicted once the store grows beyond ``max_bytes``.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ArtifactCache, cls).__new__(cls)
+            cls._instance.root = ARTIFACT_CACHE_DIR
+            cls._instance.max_bytes = ARTIFACT_CACHE_MAX_BYTES
+        return cls._instance
+
+    @staticmethod
+    def key(**params) -> str:
+        """Digest of the generation parameters; every value must be JSON serializable"""
+        payload = json.dumps(params, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    @contextmanager
+    def _lock(self, name: str, blocking: bool = True):
+        lock_dir = os.path.join(self.root, ".locks")
+        os.makedirs(lock_dir, exist_ok=True)
+        with open(os.path.join(lock_dir, f"{name}.lock"), "a") as handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _link(src: str, dst: str) -> None:
+        # Linked under a temporary name and renamed, so a reader of dst never sees a partial file
+        tmp = f"{dst}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.link(src, tmp)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            # Another filesystem, or one without hardlinks
+            shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+
+    def fetch(self, key: str, dst_dir: str) -> Optional[Dict[str, Any]]:
+        """
+        Link a cached entry's files into dst_dir
+
+        Returns:
+            Optional[Dict[str, Any]]: The entry's metadata, or None when the key is not cached
+        """
+        entry = self._entry(key)
+        meta_path = os.path.join(entry, _META)
+        try:
+            with open(meta_path) as handle:
+                meta = json.load(handle)
+            for relative in meta["files"]:
+                dst = os.path.join(dst_dir, relative)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                self._link(os.path.join(entry, relative), dst)
+            # The metadata mtime is the entry's last use for eviction
+            os.utime(meta_path)
+        except FileNotFoundError:
+            # Not generated yet, or evicted while being linked
+            return None
+        return meta
+
+    def get_or_create(self, key: str, dst_dir: str, generate: Callable[[str], Any],
+                      params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Serve the artifacts of key into dst_dir, generating them first on a miss
+
+        Args:
+            key: Digest of the generation parameters, see ``key``
+            dst_dir: Directory the artifacts are linked into
+            generate: Writes the artifacts into the directory it is given and returns the result
+                stored with the entry; a False result is returned without being cached
+            params: Generation parameters recorded in the entry's metadata
+
+        Returns:
+            Any: The result of the generation that built the entry
+        """
+        meta = self.fetch(key, dst_dir)
+        if meta is not None:
+            return meta["result"]
+
+        with self._lock(key):
+            # Generated by another worker while this one waited for the lock
+            meta = self.fetch(key, dst_dir)
+            if meta is not None:
+                return meta["result"]
+
+            started = time.perf_counter()
+            tmp = tempfile.mkdtemp(prefix=f".tmp-{key}-", dir=self.root)
+            try:
+                result = generate(tmp)
+                if result is False:
+                    shutil.rmtree(tmp, ignore_errors=True)
+                    return result
+                self._publish(key, tmp, result, params)
+            except Exception:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+            logger.debug(f"Generated artifact {key[:12]} in {time.perf_counter() - started:.2f}s")
+
+        self.evict(keep=key)
+        meta = self.fetch(key, dst_dir)
+        if meta is None:
+            raise FileNotFoundError(f"Artifact {key} was evicted right after being generated")
+        return meta["result"]
+
+    def _publish(self, key: str, tmp: str, result: Any, params: Optional[Dict[str, Any]]) -> None:
+        files, size = list(), 0
+        for root, _, names in os.walk(tmp):
+            for name in names:
+                path = os.path.join(root, name)
+                # Shared by every hardlink: a writer truncating a served copy would corrupt the entry
+                os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+                files.append(os.path.relpath(path, tmp))
+                size += os.path.getsize(path)
+        with open(os.path.join(tmp, _META), "w") as handle:
+            json.dump({"params": params or {}, "result": result, "files": files, "bytes": size,
+                       "created": time.time()}, handle)
+        os.rename(tmp, self._entry(key))
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Remove the least recently used entries until the store fits in max_bytes
+
+        Returns:
+            int: Number of evicted entries
+        """
+        with self._lock("evict", blocking=False) as acquired:
+            if not acquired:
+                # Another worker is already evicting
+                return 0
+            entries, total, now = list(), 0, time.time()
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if name.startswith(".trash-"):
+                    shutil.rmtree(path, ignore_errors=True)
+                    continue
+                if name.startswith(".tmp-"):
+                    try:
+                        if now - os.path.getmtime(path) > _STALE_TMP_SECONDS:
+                            shutil.rmtree(path, ignore_errors=True)
+                    except FileNotFoundError:
+                        pass
+                    continue
+                if name.startswith("."):
+                    continue
+                try:
+                    meta_path = os.path.join(path, _META)
+                    with open(meta_path) as handle:
+                        size = json.load(handle)["bytes"]
+                    entries.append((os.path.getmtime(meta_path), size, name))
+                except (FileNotFoundError, ValueError, KeyError):
+                    continue
+                total += size
+
+            evicted = 0
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if name == keep:
+                    continue
+                # Renamed away first, so a concurrent fetch finds either the whole entry or none
+                trash = os.path.join(self.root, f".trash-{name}-{uuid.uuid4().hex}")
+                try:
+                    os.rename(self._entry(name), trash)
+                except FileNotFoundError:
+                    continue
+                shutil.rmtree(trash, ignore_errors=True)
+                total -= size
+                evicted += 1
+            if evicted:
+                logger.info(f"Evicted {evicted} coding task artifacts, {total} bytes cached")
+            return evicted
+
+
+artifact_cache = ArtifactCache()
@@ -0,0 +1,249 @@
+import abc
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+from pymongo.errors import DuplicateKeyError
+
+from constants.configurations import (
+    CHAT_HISTORY_BACKEND,
+    CHAT_HISTORY_COLLECTION,
+    CHAT_HISTORY_CACHE_SIZE,
+    CHAT_HISTORY_CACHE_TTL
+)
+from exceptions.chat import ConversationConflictError
+from utils.cache_utility import LRUCache
+from utils.logger_utility import logger
+from utils.mongo_utility import MongoDBClient
+
+
+class Conversation(object):
+    """
+    Messages of a chat session (system prompt excluded) and the version they were read at.
+
+    ``summary`` is the rolling summary of the first ``summarized_upto`` messages, the turns that no
+    longer fit the context budget. Stores may leave those out: ``messages`` then starts at the
+    absolute index ``offset``, and ``since`` addresses them by absolute index.
+    """
+
+    def __init__(self, session_id: str, messages: Optional[List[BaseMessage]] = None, version: int = 0,
+                 summary: str = "", summarized_upto: int = 0, offset: int = 0):
+        self.session_id = session_id
+        self.messages = messages or list()
+        self.version = version
+        self.summary = summary
+        self.summarized_upto = summarized_upto
+        self.offset = offset
+
+    def since(self, start: int, end: Optional[int] = None) -> List[BaseMessage]:
+        """Messages from the absolute index ``start`` up to ``end``"""
+        return self.messages[start - self.offset:None if end is None else end - self.offset]
+
+    def copy(self) -> "Conversation":
+        return Conversation(self.session_id, list(self.messages), self.version, self.summary, self.summarized_upto,
+                            self.offset)
+
+
+class ConversationStore(abc.ABC):
+    """Abstract base class for chat history backends"""
+
+    @abc.abstractmethod
+    def load(self, session_id: str) -> Conversation:
+        """Load the conversation of a session, empty if it does not exist"""
+        pass
+
+    def current_version(self, session_id: str) -> int:
+        """Version of the stored conversation, 0 if it does not exist"""
+        return self.load(session_id).version
+
+    @abc.abstractmethod
+    def append(self, session_id: str, messages: List[BaseMessage], expected_version: int) -> Conversation:
+        """
+        Append messages to a conversation read at ``expected_version``
+
+        Returns:
+            Conversation: The updated conversation; its messages may start at any ``offset`` up to
+            ``expected_version``
+
+        Raises:
+            ConversationConflictError: If the conversation changed since it was read
+        """
+        pass
+
+    @abc.abstractmethod
+    def set_summary(self, session_id: str, summary: str, summarized_upto: int) -> None:
+        """Store the rolling summary of the first ``summarized_upto`` messages, unless a newer one exists"""
+        pass
+
+
+class InMemoryConversationStore(ConversationStore):
+    """Single-process store, for development and load tests without MongoDB"""
+
+    def __init__(self):
+        self._data: Dict[str, Conversation] = dict()
+        self._lock = threading.Lock()
+
+    def load(self, session_id: str) -> Conversation:
+        with self._lock:
+            conversation = self._data.get(session_id)
+            if conversation is None:
+                return Conversation(session_id)
+            return conversation.copy()
+
+    def append(self, session_id: str, messages: List[BaseMessage], expected_version: int) -> Conversation:
+        with self._lock:
+            current = self._data.get(session_id, Conversation(session_id))
+            if current.version != expected_version:
+                raise ConversationConflictError()
+            updated = current.copy()
+            updated.messages.extend(messages)
+            updated.version += len(messages)
+            self._data[session_id] = updated
+            return updated.copy()
+
+    def set_summary(self, session_id: str, summary: str, summarized_upto: int) -> None:
+        with self._lock:
+            current = self._data.get(session_id)
+            if current is not None and current.summarized_upto < summarized_upto:
+                current.summary = summary
+                current.summarized_upto = summarized_upto
+
+
+class MongoConversationStore(ConversationStore):
+    """
+    Durable store shared by all workers. The version is the number of stored messages and
+    appends are conditional on it, so two workers never interleave a turn silently.
+    """
+
+    def __init__(self, collection_name: str = CHAT_HISTORY_COLLECTION):
+        self.collection = MongoDBClient().get_collection(collection_name)
+        try:
+            self.collection.create_index("session_id", unique=True, background=True)
+        except Exception as e:
+            logger.warning(f"Failed to create chat history index: {str(e)}")
+
+    def load(self, session_id: str) -> Conversation:
+        # Summarized messages are never sent to the model again, so they are not read either
+        messages = {"$ifNull": ["$messages", []]}
+        documents = list(self.collection.aggregate([
+            {"$match": {"session_id": session_id}},
+            {"$project": {
+                "_id": 0,
+                "version": 1,
+                "summary": 1,
+                "summarized_upto": 1,
+                "messages": {"$slice": [messages, {"$ifNull": ["$summarized_upto", 0]},
+                                        {"$max": [{"$size": messages}, 1]}]}
+            }}
+        ]))
+        if not documents:
+            return Conversation(session_id)
+        document = documents[0]
+        return self._to_conversation(session_id, document, offset=document.get("summarized_upto", 0))
+
+    def current_version(self, session_id: str) -> int:
+        document = self.collection.find_one({"session_id": session_id}, {"_id": 0, "version": 1})
+        return document.get("version", 0) if document else 0
+
+    @staticmethod
+    def _to_conversation(session_id: str, document: Dict, offset: int) -> Conversation:
+        return Conversation(session_id,
+                            messages=messages_from_dict(document.get("messages", [])),
+                            version=document.get("version", 0),
+                            summary=document.get("summary", ""),
+                            summarized_upto=document.get("summarized_upto", 0),
+                            offset=offset)
+
+    def append(self, session_id: str, messages: List[BaseMessage], expected_version: int) -> Conversation:
+        try:
+            document = self.collection.find_one_and_update(
+                {"session_id": session_id, "version": expected_version},
+                {
+                    "$push": {"messages": {"$each": messages_to_dict(messages)}},
+                    "$inc": {"version": len(messages)},
+                    "$set": {"updated_at": datetime.utcnow()}
+                },
+                upsert=expected_version == 0,
+                # Only the appended messages, which are the last ones since the update was conditional
+                projection={"_id": 0, "version": 1, "summary": 1, "summarized_upto": 1,
+                            "messages": {"$slice": -len(messages)}},
+                return_document=True
+            )
+        except DuplicateKeyError:
+            # The conversation was created by another worker after we read it as empty
+            document = None
+
+        if not document:
+            raise ConversationConflictError()
+        return self._to_conversation(session_id, document, offset=expected_version)
+
+    def set_summary(self, session_id: str, summary: str, summarized_upto: int) -> None:
+        self.collection.update_one(
+            {
+                "session_id": session_id,
+                "$or": [{"summarized_upto": {"$lt": summarized_upto}},
+                        {"summarized_upto": {"$exists": False}}]
+            },
+            {"$set": {"summary": summary, "summarized_upto": summarized_upto}}
+        )
+
+
+class TieredConversationStore(ConversationStore):
+    """
+    LRU/TTL-bounded in-process hot tier in front of a durable store. Writes go through to the
+    durable store first, and a hot entry is only used while its version is the durable one (a
+    projection-only read), so any worker can serve any candidate without missing turns written
+    by another worker.
+    """
+
+    def __init__(self, durable: ConversationStore, maxsize: int = CHAT_HISTORY_CACHE_SIZE,
+                 ttl: float = CHAT_HISTORY_CACHE_TTL):
+        self.durable = durable
+        self.hot = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def load(self, session_id: str) -> Conversation:
+        conversation = self.hot.get(session_id)
+        if conversation is None or conversation.version != self.durable.current_version(session_id):
+            conversation = self.durable.load(session_id)
+            self.hot.set(session_id, conversation)
+        return conversation.copy()
+
+    def append(self, session_id: str, messages: List[BaseMessage], expected_version: int) -> Conversation:
+        cached = self.hot.get(session_id)
+        try:
+            appended = self.durable.append(session_id, messages, expected_version)
+        except ConversationConflictError:
+            self.hot.pop(session_id)
+            raise
+        if cached is None or cached.version != expected_version:
+            # The durable store may return only the appended messages: read it in full on next load
+            self.hot.pop(session_id)
+            return appended.copy()
+        conversation = cached.copy()
+        conversation.messages.extend(messages)
+        conversation.version = appended.version
+        if appended.summarized_upto > conversation.summarized_upto:
+            conversation.summary = appended.summary
+            conversation.summarized_upto = appended.summarized_upto
+        self.hot.set(session_id, conversation)
+        return conversation.copy()
+
+    def set_summary(self, session_id: str, summary: str, summarized_upto: int) -> None:
+        self.durable.set_summary(session_id, summary, summarized_upto)
+        conversation = self.hot.get(session_id)
+        if conversation is not None and conversation.summarized_upto < summarized_upto:
+            conversation = conversation.copy()
+            conversation.summary = summary
+            conversation.summarized_upto = summarized_upto
+            self.hot.set(session_id, conversation)
+
+
+def get_conversation_store() -> ConversationStore:
+    """Factory function to get the configured chat history store"""
+    if CHAT_HISTORY_BACKEND.lower() == "mongo":
+        return TieredConversationStore(durable=MongoConversationStore())
+    elif CHAT_HISTORY_BACKEND.lower() == "memory":
+        return InMemoryConversationStore()
+    else:
+        raise ValueError(f"Unsupported chat history backend: {CHAT_HISTORY_BACKEND}")
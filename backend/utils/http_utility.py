@@ -0,0 +1,72 @@
+import asyncio
+from typing import Dict, Optional
+
+import httpx
+from constants.configurations import (
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_TIMEOUT_SECONDS
+)
+from utils.logger_utility import logger
+
+
+class AsyncHTTPClient:
+    """
+    Process-wide async HTTP client with a pooled connector.
+
+    Outbound calls are grouped by an upstream name (e.g. "gitlab") and every group has its own
+    semaphore, so a slow upstream only queues the requests that actually target it.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AsyncHTTPClient, cls).__new__(cls)
+            cls._instance._client = None
+            cls._instance._semaphores = dict()
+            cls._instance._limits = dict()
+        return cls._instance
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Get the pooled client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            logger.debug(f"Creating pooled async HTTP client with max {HTTP_MAX_CONNECTIONS} connections")
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS),
+                timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS)
+            )
+        return self._client
+
+    def set_limit(self, upstream: str, max_concurrency: int) -> None:
+        """Bound the number of in-flight requests towards an upstream"""
+        self._limits[upstream] = max_concurrency
+        self._semaphores.pop(upstream, None)
+
+    def _get_semaphore(self, upstream: str) -> Optional[asyncio.Semaphore]:
+        if upstream not in self._limits:
+            return None
+        if upstream not in self._semaphores:
+            self._semaphores[upstream] = asyncio.Semaphore(self._limits[upstream])
+        return self._semaphores[upstream]
+
+    async def get(self, url: str, upstream: Optional[str] = None, headers: Optional[Dict] = None,
+                  **kwargs) -> httpx.Response:
+        """Perform a GET request, waiting for a free slot of the upstream if it is bounded"""
+        return await self.request("GET", url, upstream=upstream, headers=headers, **kwargs)
+
+    async def request(self, method: str, url: str, upstream: Optional[str] = None,
+                      headers: Optional[Dict] = None, **kwargs) -> httpx.Response:
+        """Perform a request, waiting for a free slot of the upstream if it is bounded"""
+        semaphore = self._get_semaphore(upstream) if upstream else None
+        if semaphore is None:
+            return await self.client.request(method, url, headers=headers, **kwargs)
+        async with semaphore:
+            return await self.client.request(method, url, headers=headers, **kwargs)
+
+    async def close(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.debug("Async HTTP client closed")
+        self._client = None
@@ -0,0 +1,250 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, List, Optional
+
+from langchain_core.messages import BaseMessage, SystemMessage
+
+from constants.configurations import (
+    CHAT_LLM_HEDGE_PERCENTILE,
+    CHAT_LLM_HEDGE_MIN_SAMPLES,
+    CHAT_LLM_FAILURE_COOLDOWN_SECONDS,
+    CHAT_LLM_MAX_COOLDOWN_SECONDS
+)
+from exceptions.chat import LLMQueueTimeoutError
+from utils.llm_utility import FairScheduler
+from utils.logger_utility import logger
+from utils.metrics_utility import metrics
+
+# Response metadata naming the backend that served a call
+BACKEND_METADATA_KEY = "llm_backend"
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Throttling, server errors, timeouts and connection failures are worth another backend"""
+    if isinstance(error, (LLMQueueTimeoutError, asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status_code = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status_code, int):
+        return status_code in (408, 429) or status_code >= 500
+    # SDK errors raised before a response exists (APIConnectionError, APITimeoutError, ...)
+    name = type(error).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+class LLMBackend(object):
+    """One configured model deployment with its observed latency and health"""
+
+    def __init__(self, name: str, provider: str, llm, weight: float = 1.0, window: int = 200):
+        """
+        Args:
+            name: Backend name, also its concurrency key in the scheduler
+            provider: anthropic, openai, azure or mock
+            llm: The LangChain chat model of the deployment
+            weight: Relative share of the traffic at equal latency
+            window: Number of recent latencies kept for the hedging percentile
+        """
+        self.name = name
+        self.provider = provider
+        self.llm = llm
+        self.weight = weight
+        self.latencies = deque(maxlen=window)
+        self.ewma_latency: Optional[float] = None
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return self.cooldown_until <= time.monotonic()
+
+    def score(self) -> float:
+        """Traffic share: the weight discounted by the observed latency"""
+        return self.weight / max(self.ewma_latency or 1.0, 0.05)
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        if len(self.latencies) < CHAT_LLM_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def record_success(self, latency: Optional[float] = None, hedging: bool = True) -> None:
+        """
+        Args:
+            latency: Duration of the whole call, None when it is not over yet
+            hedging: Whether the latency feeds the hedging percentile; streams only feed the average
+        """
+        self.consecutive_failures = 0
+        if latency is None:
+            return
+        if hedging:
+            self.latencies.append(latency)
+        self.ewma_latency = latency if self.ewma_latency is None else 0.8 * self.ewma_latency + 0.2 * latency
+        metrics.observe(f"llm.backend.latency_seconds.{self.name}", latency)
+
+    def record_failure(self, error: BaseException) -> None:
+        metrics.inc(f"llm.backend.errors.{self.name}")
+        if not is_retryable(error):
+            return
+        self.consecutive_failures += 1
+        cooldown = min(CHAT_LLM_FAILURE_COOLDOWN_SECONDS * 2 ** (self.consecutive_failures - 1),
+                       CHAT_LLM_MAX_COOLDOWN_SECONDS)
+        self.cooldown_until = time.monotonic() + cooldown
+        logger.warning(f"LLM backend {self.name} failed ({type(error).__name__}), skipping it for {cooldown:.0f}s")
+
+    def stats(self) -> dict:
+        p95 = self.latency_percentile(0.95)
+        return {
+            "provider": self.provider,
+            "weight": self.weight,
+            "healthy": self.healthy,
+            "cooldown_seconds": round(max(0.0, self.cooldown_until - time.monotonic()), 3),
+            "ewma_latency": round(self.ewma_latency, 4) if self.ewma_latency is not None else None,
+            "p95_latency": round(p95, 4) if p95 is not None else None,
+            "consecutive_failures": self.consecutive_failures
+        }
+
+
+class LLMRouter(object):
+    """
+    Spreads chat calls over several LLM backends.
+
+    Backends are drawn at random in proportion to their weight over their recent latency. A call
+    failing with 429/5xx or a timeout is retried on another backend, and the failing one is
+    skipped for a growing cooldown. With ``hedge_percentile`` set, a call still running past that
+    percentile of its backend's latency gets a second call on another backend and the first
+    answer wins. Streams fail over only until their first chunk and are never hedged.
+    """
+
+    def __init__(self, backends: List[LLMBackend], hedge_percentile: float = CHAT_LLM_HEDGE_PERCENTILE):
+        if not backends:
+            raise ValueError("At least one LLM backend is required")
+        self.backends = backends
+        self.hedge_percentile = hedge_percentile
+        self.scheduler = FairScheduler()
+        self._random = random.Random()
+
+    def _pick(self, exclude: List[LLMBackend]) -> Optional[LLMBackend]:
+        candidates = [b for b in self.backends if b not in exclude]
+        if not candidates:
+            return None
+        healthy = [b for b in candidates if b.healthy]
+        if not healthy:
+            # Everything is cooling down: try the one that recovers first
+            return min(candidates, key=lambda b: b.cooldown_until)
+        return self._random.choices(healthy, weights=[b.score() for b in healthy])[0]
+
+    @staticmethod
+    def _adapt(backend: LLMBackend, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """Flatten content blocks (prompt cache breakpoints) for providers that take plain text"""
+        if backend.provider in ("anthropic", "mock"):
+            return messages
+        adapted = list()
+        for message in messages:
+            if isinstance(message, SystemMessage) and isinstance(message.content, list):
+                text = "\n".join(block.get("text", "") for block in message.content if isinstance(block, dict))
+                message = SystemMessage(content=text)
+            adapted.append(message)
+        return adapted
+
+    async def _invoke(self, backend: LLMBackend, messages: List[BaseMessage], user_id: str) -> Any:
+        try:
+            async with self.scheduler.slot(backend.name, user_id):
+                started = time.perf_counter()
+                response = await backend.llm.ainvoke(self._adapt(backend, messages))
+        except Exception as e:
+            backend.record_failure(e)
+            raise
+        backend.record_success(time.perf_counter() - started)
+        self._tag(response, backend)
+        return response
+
+    @staticmethod
+    def _tag(message: Any, backend: LLMBackend) -> None:
+        metadata = getattr(message, "response_metadata", None)
+        if isinstance(metadata, dict):
+            metadata[BACKEND_METADATA_KEY] = backend.name
+
+    async def _hedged(self, backend: LLMBackend, messages: List[BaseMessage], user_id: str,
+                      tried: List[LLMBackend]) -> Any:
+        primary = asyncio.ensure_future(self._invoke(backend, messages, user_id))
+        delay = backend.latency_percentile(self.hedge_percentile) if self.hedge_percentile else None
+        if delay is None:
+            return await primary
+
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            alternate = None if done else self._pick(tried)
+            if alternate is not None:
+                tried.append(alternate)
+                metrics.inc(f"llm.backend.hedges.{backend.name}")
+                pending.add(asyncio.ensure_future(self._invoke(alternate, messages, user_id)))
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def ainvoke(self, messages: List[BaseMessage], user_id: str) -> Any:
+        """
+        Answer with the first backend that succeeds; the response metadata names it
+
+        Raises:
+            Exception: The last error once every backend failed, or the first non-retryable one
+        """
+        tried, last_error = list(), None
+        while True:
+            backend = self._pick(tried)
+            if backend is None:
+                raise last_error
+            tried.append(backend)
+            try:
+                return await self._hedged(backend, messages, user_id, tried)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                last_error = e
+                metrics.inc(f"llm.backend.failovers.{backend.name}")
+
+    async def astream(self, messages: List[BaseMessage], user_id: str) -> AsyncIterator[Any]:
+        """Stream from the first backend that starts answering; its first chunk names the backend"""
+        tried, last_error = list(), None
+        while True:
+            backend = self._pick(tried)
+            if backend is None:
+                raise last_error
+            tried.append(backend)
+            streaming = False
+            try:
+                async with self.scheduler.slot(backend.name, user_id):
+                    started = time.perf_counter()
+                    async for chunk in backend.llm.astream(self._adapt(backend, messages)):
+                        if not streaming:
+                            # Time to first token is not comparable with the call latencies used for hedging
+                            streaming = True
+                            backend.record_success()
+                            metrics.observe(f"llm.backend.ttft_seconds.{backend.name}", time.perf_counter() - started)
+                            # Only on the first chunk, so that merging the chunks keeps a single name
+                            self._tag(chunk, backend)
+                        yield chunk
+                if streaming:
+                    # A whole stream takes about as long as an invoke, so it can steer the traffic share
+                    backend.record_success(time.perf_counter() - started, hedging=False)
+                return
+            except Exception as e:
+                backend.record_failure(e)
+                if streaming or not is_retryable(e):
+                    raise
+                last_error = e
+                metrics.inc(f"llm.backend.failovers.{backend.name}")
+
+    def stats(self) -> dict:
+        return {backend.name: backend.stats() for backend in self.backends}
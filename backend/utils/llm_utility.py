@@ -0,0 +1,152 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from constants.configurations import (
+    CHAT_LLM_CONCURRENCY,
+    CHAT_LLM_DEFAULT_CONCURRENCY,
+    CHAT_LLM_QUEUE_DEADLINE_SECONDS
+)
+from exceptions.chat import LLMQueueTimeoutError
+from utils.logger_utility import logger
+from utils.metrics_utility import metrics
+
+
+def parse_concurrency_limits(spec: str) -> Dict[str, int]:
+    """Parse ``provider:limit`` entries separated by commas"""
+    limits = dict()
+    for entry in filter(None, (e.strip() for e in spec.split(","))):
+        try:
+            provider, limit = entry.rsplit(":", 1)
+            limits[provider.strip()] = max(1, int(limit))
+        except ValueError:
+            logger.warning(f"Ignoring malformed LLM concurrency entry: {entry}")
+    return limits
+
+
+class _ProviderQueue(object):
+    """In-flight cap of one provider with a FIFO queue per user, served round-robin"""
+
+    def __init__(self, provider: str, capacity: int):
+        self.provider = provider
+        self.capacity = capacity
+        self.in_flight = 0
+        self.waiting = 0
+        # Users with queued calls, in the order they are served next
+        self.queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    def try_acquire(self) -> bool:
+        if self.in_flight < self.capacity and not self.waiting:
+            self.in_flight += 1
+            return True
+        return False
+
+    def enqueue(self, user_id: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.queues.setdefault(user_id, deque()).append(future)
+        self.waiting += 1
+        return future
+
+    def withdraw(self, user_id: str, future: asyncio.Future) -> None:
+        queue = self.queues.get(user_id)
+        if queue is not None and future in queue:
+            queue.remove(future)
+            self.waiting -= 1
+            if not queue:
+                del self.queues[user_id]
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self.dispatch()
+
+    def dispatch(self) -> None:
+        """Hand free slots to the next user in turn, one call per user per round"""
+        while self.in_flight < self.capacity and self.queues:
+            user_id, queue = self.queues.popitem(last=False)
+            future = queue.popleft()
+            self.waiting -= 1
+            if queue:
+                self.queues[user_id] = queue
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+
+class FairScheduler:
+    """
+    Admits LLM calls of a worker per provider, fairly across users.
+
+    At most the provider's limit of calls is in flight; the rest wait in one queue per user and
+    free slots go to the users in round-robin order, so a candidate firing many prompts only
+    delays their own. A call that cannot start within its deadline fails fast with
+    LLMQueueTimeoutError instead of piling up behind the provider's rate limit.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(FairScheduler, cls).__new__(cls)
+            cls._instance._limits = parse_concurrency_limits(CHAT_LLM_CONCURRENCY)
+            cls._instance._queues = dict()
+        return cls._instance
+
+    def limit(self, provider: str) -> int:
+        return self._limits.get(provider, CHAT_LLM_DEFAULT_CONCURRENCY)
+
+    def _get_queue(self, provider: str) -> _ProviderQueue:
+        if provider not in self._queues:
+            self._queues[provider] = _ProviderQueue(provider, self.limit(provider))
+        return self._queues[provider]
+
+    def _publish(self, queue: _ProviderQueue) -> None:
+        metrics.set_gauge(f"llm.in_flight.{queue.provider}", queue.in_flight)
+        metrics.set_gauge(f"llm.queue_depth.{queue.provider}", queue.waiting)
+
+    async def _acquire(self, queue: _ProviderQueue, user_id: str, deadline: float) -> None:
+        if queue.try_acquire():
+            return
+        future = queue.enqueue(user_id)
+        self._publish(queue)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=deadline)
+        except asyncio.TimeoutError:
+            if future.done():
+                # The slot was granted as the deadline passed; take it rather than waste it
+                return
+            queue.withdraw(user_id, future)
+            metrics.inc(f"llm.queue_timeouts.{queue.provider}")
+            raise LLMQueueTimeoutError()
+        except asyncio.CancelledError:
+            if future.done():
+                queue.release()
+            else:
+                queue.withdraw(user_id, future)
+            raise
+        finally:
+            self._publish(queue)
+
+    @asynccontextmanager
+    async def slot(self, provider: str, user_id: str, deadline: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Hold one of the provider's slots for the duration of a call or stream
+
+        Args:
+            provider: The LLM provider the call goes to
+            user_id: Whose queue the call waits in
+            deadline: Seconds the call may wait for a slot, CHAT LLM_QUEUE_DEADLINE_SECONDS by default
+
+        Raises:
+            LLMQueueTimeoutError: If no slot became free within the deadline
+        """
+        queue = self._get_queue(provider)
+        started = time.perf_counter()
+        await self._acquire(queue, user_id, CHAT_LLM_QUEUE_DEADLINE_SECONDS if deadline is None else deadline)
+        metrics.observe(f"llm.queue_wait_seconds.{provider}", time.perf_counter() - started)
+        self._publish(queue)
+        try:
+            yield
+        finally:
+            queue.release()
+            self._publish(queue)
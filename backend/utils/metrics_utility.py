@@ -0,0 +1,95 @@
+import threading
+from collections import defaultdict, deque
+from typing import Callable, Dict, Optional
+
+
+class _Timer(object):
+    def __init__(self, window: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def percentile(self, q: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> Dict:
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 6) if self.count else 0.0,
+            "p50": round(self.percentile(0.5), 6),
+            "p95": round(self.percentile(0.95), 6),
+            "max": round(self.max, 6)
+        }
+
+
+class MetricsRegistry:
+    """
+    Process-local registry of counters, gauges and timers exposed through the /metrics route.
+
+    Metric names are dotted strings, e.g. ``admission.queue_depth./mcq/start-assessment``.
+    """
+    _instance = None
+
+    def __new__(cls, window: int = 1024):
+        if cls._instance is None:
+            cls._instance = super(MetricsRegistry, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._window = window
+            cls._instance._counters = defaultdict(float)
+            cls._instance._gauges = dict()
+            cls._instance._timers = dict()
+            cls._instance._sources = dict()
+        return cls._instance
+
+    def register_source(self, name: str, source: Callable[[], Dict]) -> None:
+        """Report the state returned by source under ``sources`` in every snapshot"""
+        with self._lock:
+            self._sources[name] = source
+
+    def inc(self, name: str, value: float = 1.0) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record a duration (seconds) or any other distribution sample"""
+        with self._lock:
+            if name not in self._timers:
+                self._timers[name] = _Timer(self._window)
+            self._timers[name].observe(value)
+
+    def timer(self, name: str) -> Optional[Dict]:
+        with self._lock:
+            timer = self._timers.get(name)
+            return timer.snapshot() if timer else None
+
+    def snapshot(self, prefix: Optional[str] = None) -> Dict:
+        with self._lock:
+            data = {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timers": {k: v.snapshot() for k, v in self._timers.items()}
+            }
+            sources = dict(self._sources)
+        # Called outside the lock: sources may record metrics themselves
+        data["sources"] = {name: source() for name, source in sources.items()}
+        if prefix:
+            data = {kind: {k: v for k, v in values.items() if k.startswith(prefix)}
+                    for kind, values in data.items()}
+        return data
+
+
+metrics = MetricsRegistry()
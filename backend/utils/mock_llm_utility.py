@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+import math
+import random
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from constants.configurations import (
+    MOCK_LLM_LATENCY_MS,
+    MOCK_LLM_LATENCY_DISTRIBUTION,
+    MOCK_LLM_LATENCY_JITTER_MS,
+    MOCK_LLM_RESPONSE_TOKENS,
+    MOCK_LLM_CHUNK_TOKENS,
+    MOCK_LLM_CHUNK_DELAY_MS,
+    MOCK_LLM_ERROR_RATE,
+    MOCK_LLM_RESPONSE_TEMPLATE,
+    MOCK_LLM_SEED
+)
+from exceptions.chat import MockProviderError
+
+FILLER = ("consider", "the", "shape", "of", "your", "data", "and", "what", "each", "step", "returns")
+
+
+class MockChatModel(BaseChatModel):
+    """
+    Offline chat model for load tests of the chat path.
+
+    The response text is a deterministic function of the conversation (``response_template``
+    padded to ``response_tokens`` words); the time to the first token follows the configured
+    latency distribution and every streamed chunk of ``chunk_tokens`` words adds ``chunk_delay_ms``.
+    With ``error_rate`` a call fails before the first token with a 429 or 500 MockProviderError.
+    """
+
+    latency_ms: float = MOCK_LLM_LATENCY_MS
+    latency_distribution: str = MOCK_LLM_LATENCY_DISTRIBUTION
+    latency_jitter_ms: float = MOCK_LLM_LATENCY_JITTER_MS
+    response_tokens: int = MOCK_LLM_RESPONSE_TOKENS
+    chunk_tokens: int = MOCK_LLM_CHUNK_TOKENS
+    chunk_delay_ms: float = MOCK_LLM_CHUNK_DELAY_MS
+    error_rate: float = MOCK_LLM_ERROR_RATE
+    response_template: str = MOCK_LLM_RESPONSE_TEMPLATE
+    seed: int = MOCK_LLM_SEED
+
+    _rng: Optional[random.Random] = PrivateAttr(default=None)
+
+    @property
+    def rng(self) -> random.Random:
+        if self._rng is None:
+            self._rng = random.Random(self.seed)
+        return self._rng
+
+    @property
+    def _llm_type(self) -> str:
+        return "mock"
+
+    def _first_token_delay(self) -> float:
+        """Seconds until the first token, drawn from the latency distribution"""
+        if self.latency_distribution == "uniform":
+            delay = self.rng.uniform(self.latency_ms - self.latency_jitter_ms,
+                                      self.latency_ms + self.latency_jitter_ms)
+        elif self.latency_distribution == "lognormal" and self.latency_ms > 0:
+            # Parameters of the underlying normal for the requested mean and standard deviation
+            sigma2 = math.log(1 + (self.latency_jitter_ms / self.latency_ms) ** 2)
+            delay = self.rng.lognormvariate(math.log(self.latency_ms) - sigma2 / 2, math.sqrt(sigma2))
+        else:
+            delay = self.latency_ms
+        return max(0.0, delay) / 1000
+
+    def _maybe_fail(self) -> None:
+        if self.error_rate and self.rng.random() < self.error_rate:
+            raise MockProviderError(status_code=self.rng.choice((429, 500)))
+
+    def _respond(self, messages: List[BaseMessage]) -> List[str]:
+        """Words of the response; the same conversation always gets the same response"""
+        prompt = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        prompt = prompt if isinstance(prompt, str) else str(prompt)
+        digest = hashlib.sha1("\0".join(str(m.content) for m in messages).encode("utf-8")).hexdigest()[:8]
+        words = self.response_template.format(prompt=prompt[:200], turns=len(messages), digest=digest).split()
+        index = 0
+        while len(words) < self.response_tokens:
+            words.append(FILLER[index % len(FILLER)])
+            index += 1
+        return words
+
+    def _chunks(self, words: List[str]) -> List[str]:
+        size = max(1, self.chunk_tokens)
+        return [" ".join(words[i:i + size]) + (" " if i + size < len(words) else "")
+                for i in range(0, len(words), size)]
+
+    @staticmethod
+    def _usage(messages: List[BaseMessage], words: List[str]) -> dict:
+        input_tokens = sum(len(str(m.content)) // 4 for m in messages)
+        return {"input_tokens": input_tokens, "output_tokens": len(words),
+                "total_tokens": input_tokens + len(words)}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        self._maybe_fail()
+        words = self._respond(messages)
+        time.sleep(self._first_token_delay() + len(self._chunks(words)) * self.chunk_delay_ms / 1000)
+        message = AIMessage(content=" ".join(words), usage_metadata=self._usage(messages, words))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        self._maybe_fail()
+        words = self._respond(messages)
+        await asyncio.sleep(self._first_token_delay() + len(self._chunks(words)) * self.chunk_delay_ms / 1000)
+        message = AIMessage(content=" ".join(words), usage_metadata=self._usage(messages, words))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        self._maybe_fail()
+        words = self._respond(messages)
+        time.sleep(self._first_token_delay())
+        for index, text in enumerate(self._chunks(words)):
+            if index:
+                time.sleep(self.chunk_delay_ms / 1000)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, words)))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        self._maybe_fail()
+        words = self._respond(messages)
+        await asyncio.sleep(self._first_token_delay())
+        for index, text in enumerate(self._chunks(words)):
+            if index:
+                await asyncio.sleep(self.chunk_delay_ms / 1000)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, words)))
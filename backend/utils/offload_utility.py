@@ -0,0 +1,115 @@
+import asyncio
+import functools
+import multiprocessing
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from constants.configurations import (
+    OFFLOAD_THREAD_WORKERS,
+    OFFLOAD_PROCESS_WORKERS,
+    EVENT_LOOP_LAG_INTERVAL,
+    EVENT_LOOP_LAG_WARN_SECONDS
+)
+from utils.logger_utility import logger
+from utils.metrics_utility import metrics
+
+
+class Offloader:
+    """
+    Runs blocking handler work off the event loop.
+
+    I/O-bound calls (MongoDB, PostgreSQL, Git provider HTTP, small PIL work) go to a sized thread
+    pool; CPU-heavy calls (dataset generation) go to a process pool so they do not hold the GIL
+    that the event loop needs.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Offloader, cls).__new__(cls)
+            cls._instance._thread_pool = None
+            cls._instance._process_pool = None
+        return cls._instance
+
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=OFFLOAD_THREAD_WORKERS,
+                                                   thread_name_prefix="offload")
+        return self._thread_pool
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            # Spawned, not forked: the parent holds database client and event loop threads
+            self._process_pool = ProcessPoolExecutor(max_workers=OFFLOAD_PROCESS_WORKERS,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+        return self._process_pool
+
+    async def run_blocking(self, func: Callable, *args, **kwargs) -> Any:
+        """Await a blocking call executed in the thread pool"""
+        return await self._run(self.thread_pool, "thread", func, *args, **kwargs)
+
+    async def run_cpu_bound(self, func: Callable, *args, **kwargs) -> Any:
+        """Await a CPU-heavy call executed in the process pool; func and arguments must be picklable"""
+        return await self._run(self.process_pool, "process", func, *args, **kwargs)
+
+    def submit_cpu_bound(self, func: Callable, *args, **kwargs) -> Future:
+        """Submit a CPU-heavy call to the process pool from synchronous code"""
+        return self.process_pool.submit(func, *args, **kwargs)
+
+    async def _run(self, executor, kind: str, func: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+        finally:
+            name = getattr(func, "__qualname__", getattr(func, "__name__", "call"))
+            metrics.observe(f"offload.{kind}_seconds.{name}", time.perf_counter() - started)
+
+    def shutdown(self) -> None:
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True, cancel_futures=True)
+            self._process_pool = None
+        logger.debug("Offload pools shut down")
+
+
+class EventLoopLagMonitor:
+    """Measures how late the event loop wakes up from a fixed sleep, i.e. how long it was blocked"""
+
+    def __init__(self, interval: float = EVENT_LOOP_LAG_INTERVAL,
+                 warn_threshold: float = EVENT_LOOP_LAG_WARN_SECONDS):
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            metrics.observe("event_loop.lag_seconds", lag)
+            metrics.set_gauge("event_loop.lag_seconds", lag)
+            if lag > self.warn_threshold:
+                logger.warning(f"Event loop was blocked for {lag:.3f}s")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+offloader = Offloader()
@@ -1,37 +1,72 @@
+import threading
+from contextlib import contextmanager
+
 import psycopg2
 from psycopg2.extras import execute_values
-from constants.configurations import POSTGRES_URI, POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD
+from psycopg2.pool import ThreadedConnectionPool
+from constants.configurations import (
+    POSTGRES_URI,
+    POSTGRES_DB,
+    POSTGRES_USER,
+    POSTGRES_PASSWORD,
+    POSTGRES_POOL_MIN,
+    POSTGRES_POOL_MAX
+)
 from utils.logger_utility import logger
 
 
 class PostgresClient:
+    """
+    PostgreSQL access shared by the handlers.
+
+    Every call checks a connection out of a thread-safe pool and commits or rolls back its own
+    transaction on it, so calls running concurrently on the offload threads never commit or
+    discard each other's work.
+    """
     _instance = None
-    _conn = None
+    _pool = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(PostgresClient, cls).__new__(cls)
             logger.debug("Creating new PostgresClient instance")
-            cls._instance._initialize_connection()
+            cls._instance._lock = threading.Lock()
+            # ThreadedConnectionPool raises instead of waiting when it is exhausted
+            cls._instance._slots = threading.BoundedSemaphore(POSTGRES_POOL_MAX)
+            cls._instance._initialize_pool()
         return cls._instance
 
-    def _initialize_connection(self):
-        """Initialize database connection"""
-        try:
-            if self._conn is None or self._conn.closed:
-                logger.debug(f"Initializing PostgreSQL connection with URI: {POSTGRES_URI}")
-                self._conn = psycopg2.connect(POSTGRES_URI)
+    def _initialize_pool(self):
+        """Initialize the connection pool"""
+        with self._lock:
+            if self._pool is not None and not self._pool.closed:
+                return
+            try:
+                logger.debug(f"Initializing PostgreSQL connection pool with URI: {POSTGRES_URI}")
+                self._pool = ThreadedConnectionPool(POSTGRES_POOL_MIN, POSTGRES_POOL_MAX, POSTGRES_URI)
                 logger.info("Successfully connected to PostgreSQL")
-                logger.debug("Connection details - Database: %s, User: %s", POSTGRES_DB, POSTGRES_USER)
-        except Exception as e:
-            logger.error(f"Failed to connect to PostgreSQL: {str(e)}", exc_info=True)
-            raise
+                logger.debug("Connection details - Database: %s, User: %s, Pool size: %s",
+                             POSTGRES_DB, POSTGRES_USER, POSTGRES_POOL_MAX)
+            except Exception as e:
+                logger.error(f"Failed to connect to PostgreSQL: {str(e)}", exc_info=True)
+                raise
 
-    @property
-    def conn(self):
-        """Get the database connection, reinitializing if necessary"""
-        self._initialize_connection()
-        return self._conn
+    @contextmanager
+    def connection(self):
+        """Check out a connection for one transaction, committed on success and rolled back on error"""
+        self._initialize_pool()
+        with self._slots:
+            conn = self._pool.getconn()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+            finally:
+                # A connection broken by the server is dropped, the pool opens a new one
+                self._pool.putconn(conn, close=bool(conn.closed))
 
     def execute_query(self, query: str, params=None):
         """Execute a single query"""
@@ -39,14 +74,12 @@ class PostgresClient:
             logger.debug(f"Executing query: {query}")
             if params:
                 logger.debug(f"Query parameters: {params}")
-            
-            with self.conn.cursor() as cursor:
+
+            with self.connection() as conn, conn.cursor() as cursor:
                 cursor.execute(query, params)
-                self.conn.commit()
-                logger.debug("Query executed successfully")
-                
+            logger.debug("Query executed successfully")
+
         except Exception as e:
-            self.conn.rollback()
             logger.error(f"Error executing query: {str(e)}", exc_info=True)
             logger.error(f"Failed query: {query}")
             if params:
@@ -59,14 +92,12 @@ class PostgresClient:
             logger.debug(f"Executing bulk query: {query}")
             logger.debug(f"Number of value sets to insert: {len(values)}")
             logger.debug(f"First value set (sample): {values[0] if values else 'No values'}")
-            
-            with self.conn.cursor() as cursor:
+
+            with self.connection() as conn, conn.cursor() as cursor:
                 execute_values(cursor, query, values)
-                self.conn.commit()
-                logger.debug(f"Bulk query executed successfully, inserted {len(values)} records")
-                
+            logger.debug(f"Bulk query executed successfully, inserted {len(values)} records")
+
         except Exception as e:
-            self.conn.rollback()
             logger.error(f"Error executing bulk query: {str(e)}", exc_info=True)
             logger.error(f"Failed query: {query}")
             logger.error(f"Number of values that failed to insert: {len(values)}")
@@ -78,13 +109,13 @@ class PostgresClient:
             logger.debug(f"Executing fetch_one query: {query}")
             if params:
                 logger.debug(f"Query parameters: {params}")
-                
-            with self.conn.cursor() as cursor:
+
+            with self.connection() as conn, conn.cursor() as cursor:
                 cursor.execute(query)
                 result = cursor.fetchone()
-                logger.debug(f"Fetch one result: {result}")
-                return result
-                
+            logger.debug(f"Fetch one result: {result}")
+            return result
+
         except Exception as e:
             logger.error(f"Error fetching row: {str(e)}", exc_info=True)
             raise
@@ -95,21 +126,22 @@ class PostgresClient:
             logger.debug(f"Executing fetch_all query: {query}")
             if params:
                 logger.debug(f"Query parameters: {params}")
-                
-            with self.conn.cursor() as cursor:
+
+            with self.connection() as conn, conn.cursor() as cursor:
                 cursor.execute(query, params)
                 results = cursor.fetchall()
-                logger.debug(f"Fetch all returned {len(results)} rows")
-                return results
-                
+            logger.debug(f"Fetch all returned {len(results)} rows")
+            return results
+
         except Exception as e:
             logger.error(f"Error fetching rows: {str(e)}", exc_info=True)
             raise
 
     def close(self):
-        """Close the database connection"""
-        if hasattr(self, '_conn') and self._conn is not None:
-            logger.debug("Closing PostgreSQL connection")
-            self._conn.close()
-            self._conn = None
-            logger.debug("PostgreSQL connection closed successfully") 
\ No newline at end of file
+        """Close all pooled connections"""
+        with self._lock:
+            if self._pool is not None and not self._pool.closed:
+                logger.debug("Closing PostgreSQL connection pool")
+                self._pool.closeall()
+                logger.debug("PostgreSQL connection pool closed successfully")
+            self._pool = None
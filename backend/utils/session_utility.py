@@ -0,0 +1,103 @@
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from typing import Optional
+
+from pydantic import BaseModel
+from constants.configurations import SESSION_SECRET, SESSION_TTL_SECONDS, SESSION_CACHE_SIZE, SESSION_ENFORCE
+from exceptions.session import InvalidSessionError
+from utils.cache_utility import LRUCache
+from utils.logger_utility import logger
+
+
+class SessionClaims(BaseModel):
+    user_id: str
+    start_time: Optional[int] = None  # Assessment start epoch, None until the assessment is started
+    exp: int  # Epoch seconds after which the token is rejected
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class SessionTokenManager:
+    """
+    Issues and verifies HMAC-signed session tokens of the form ``<payload>.<signature>``.
+
+    Verification happens fully in-process; decoded tokens are kept in an LRU so repeated requests
+    with the same token only pay for a dictionary lookup and an expiry check.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(SessionTokenManager, cls).__new__(cls)
+            secret = SESSION_SECRET
+            if not secret and SESSION_ENFORCE:
+                cls._instance = None
+                raise ValueError("SESSION_SECRET must be configured when SESSION_ENFORCE is enabled, "
+                                 "a per-process secret rejects every token issued by another worker")
+            if not secret:
+                logger.warning("SESSION_SECRET is not configured, using a random per-process secret. "
+                               "Tokens will not be valid across workers or restarts.")
+                secret = secrets.token_urlsafe(32)
+            cls._instance._secret = secret.encode("utf-8")
+            cls._instance._cache = LRUCache(maxsize=SESSION_CACHE_SIZE)
+        return cls._instance
+
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac.new(self._secret, payload.encode("ascii"), hashlib.sha256).digest())
+
+    def issue(self, user_id: str, start_time: Optional[int] = None) -> str:
+        """
+        Issue a signed token for a user
+
+        Args:
+            user_id: The ID of the authenticated user
+            start_time: Epoch at which the user's assessment started, if it has
+
+        Returns:
+            str: The signed session token
+        """
+        claims = {
+            "user_id": str(user_id),
+            "start_time": start_time,
+            "exp": int(time.time()) + SESSION_TTL_SECONDS
+        }
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        return f"{payload}.{self._sign(payload)}"
+
+    def verify(self, token: str) -> SessionClaims:
+        """
+        Verify a session token and return its claims
+
+        Raises:
+            InvalidSessionError: If the token is malformed, has a bad signature or has expired
+        """
+        claims = self._cache.get(token)
+        if claims is None:
+            try:
+                payload, signature = token.split(".", 1)
+            except ValueError:
+                raise InvalidSessionError("Malformed session token")
+
+            if not hmac.compare_digest(signature, self._sign(payload)):
+                raise InvalidSessionError("Invalid session token signature")
+
+            try:
+                claims = SessionClaims(**json.loads(_b64decode(payload)))
+            except Exception:
+                raise InvalidSessionError("Malformed session token")
+            self._cache.set(token, claims)
+
+        if claims.exp < time.time():
+            self._cache.pop(token)
+            raise InvalidSessionError("Session has expired, please log in again")
+        return claims
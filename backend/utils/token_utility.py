@@ -0,0 +1,95 @@
+import functools
+import hashlib
+import math
+
+import tiktoken
+
+from constants.configurations import CHAT_ANTHROPIC_TOKEN_RATIO, CHAT_TOKEN_CACHE_SIZE
+from utils.cache_utility import LRUCache
+from utils.logger_utility import logger
+from utils.metrics_utility import metrics
+
+# Average characters per token, used only when no tiktoken encoding can be loaded
+CHARS_PER_TOKEN = 4
+# Weight of each reported prompt in the running Anthropic ratio, and the bounds kept on it
+CALIBRATION_WEIGHT = 0.05
+CALIBRATION_BOUNDS = (0.8, 2.0)
+# Prompts shorter than this (in cl100k_base tokens) are dominated by framing and not calibrated on
+CALIBRATION_MIN_TOKENS = 200
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model: str):
+    """tiktoken encoding of a model, loaded once per process; cl100k_base for unknown models"""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Azure deployment names, Anthropic and new models are unknown to tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+
+
+class TokenCounter(object):
+    """
+    Offline token counts for context budgeting, memoized by content.
+
+    OpenAI and Azure models are counted exactly with their tiktoken encoding. Anthropic does not
+    publish its tokenizer, so its counts are estimated from cl100k_base scaled by ``ratio``, which
+    starts at ANTHROPIC_TOKEN_RATIO and follows the input tokens the API reports through
+    ``calibrate``. Budgeting only needs an estimate, not a network round-trip per count.
+    """
+
+    def __init__(self, provider: str, model: str, maxsize: int = CHAT_TOKEN_CACHE_SIZE,
+                 ratio: float = CHAT_ANTHROPIC_TOKEN_RATIO):
+        """
+        Args:
+            provider: The configured LLM provider
+            model: The configured model name
+            maxsize: Number of memoized counts kept
+            ratio: Initial provider tokens per cl100k_base token, applied to Anthropic models
+        """
+        self.provider = provider
+        self.model = model
+        self.ratio = ratio if provider == "anthropic" else 1.0
+        self._cache = LRUCache(maxsize=maxsize)
+        try:
+            self._encoding = get_encoding("cl100k_base" if provider == "anthropic" else model)
+        except Exception as e:
+            logger.warning(f"No tiktoken encoding available, estimating tokens from characters: {str(e)}")
+            self._encoding = None
+
+    def _count(self, text: str) -> int:
+        if self._encoding is None:
+            return len(text) // CHARS_PER_TOKEN
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def raw(self, text: str) -> int:
+        """Count of the encoding, before the provider ratio; memoized, as the ratio may change"""
+        if not text:
+            return 0
+        # Short texts are cheaper to count than to hash
+        if len(text) < 64:
+            return self._count(text)
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        count = self._cache.get(key)
+        if count is None:
+            count = self._count(text)
+            self._cache.set(key, count)
+        return count
+
+    def __call__(self, text: str) -> int:
+        tokens = self.raw(text)
+        return tokens if self.ratio == 1.0 else math.ceil(tokens * self.ratio)
+
+    def calibrate(self, estimated: int, reported: int) -> None:
+        """
+        Move the Anthropic ratio towards the one observed on a prompt
+
+        Args:
+            estimated: Raw count of the prompt, see ``raw``
+            reported: Input tokens the API reported for the same prompt
+        """
+        if self.provider != "anthropic" or estimated < CALIBRATION_MIN_TOKENS or reported <= 0:
+            return
+        observed = min(max(reported / estimated, CALIBRATION_BOUNDS[0]), CALIBRATION_BOUNDS[1])
+        self.ratio = (1 - CALIBRATION_WEIGHT) * self.ratio + CALIBRATION_WEIGHT * observed
+        metrics.set_gauge("chat.anthropic_token_ratio", self.ratio)
@@ -0,0 +1,153 @@
+import queue
+import threading
+import time
+from typing import Dict, List
+
+from mlflow.entities import Metric, Param
+from mlflow.tracking import MlflowClient
+
+from constants.configurations import (
+    MLFLOW_TRACKING_URI,
+    MLFLOW_CHAT_EXPERIMENT,
+    MLFLOW_QUEUE_SIZE,
+    MLFLOW_BATCH_SIZE,
+    MLFLOW_FLUSH_INTERVAL
+)
+from utils.logger_utility import logger
+from utils.metrics_utility import metrics
+
+
+class TrackingEvent(object):
+    """One chat turn to be recorded as an MLflow run"""
+
+    def __init__(self, tags: Dict[str, str], params: Dict[str, str], values: Dict[str, float]):
+        self.tags = tags
+        self.params = params
+        self.values = values
+        self.timestamp = int(time.time() * 1000)
+
+
+class TrackingWriter:
+    """
+    Records chat turns to MLflow from a background thread.
+
+    ``record`` only enqueues and never blocks: when the queue is full the event is dropped and
+    counted, so a slow or unavailable tracking server cannot add latency to chat. The writer
+    drains the queue in batches and records each turn as a run created with its tags, whose
+    params and metrics are sent with one ``log_batch`` call.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(TrackingWriter, cls).__new__(cls)
+            cls._instance._queue = queue.Queue(maxsize=MLFLOW_QUEUE_SIZE)
+            cls._instance._client = None
+            cls._instance._experiment_id = None
+            cls._instance._thread = None
+            cls._instance._stopping = threading.Event()
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="mlflow-writer", daemon=True)
+                self._thread.start()
+
+    def record(self, tags: Dict[str, str], params: Dict[str, str], values: Dict[str, float]) -> None:
+        """Queue a chat turn for tracking"""
+        self.start()
+        try:
+            self._queue.put_nowait(TrackingEvent(tags, params, values))
+        except queue.Full:
+            metrics.inc("tracking.dropped")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Flush what is queued, waiting at most ``timeout`` seconds"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    @property
+    def client(self) -> MlflowClient:
+        if self._client is None:
+            self._client = MlflowClient(tracking_uri=MLFLOW_TRACKING_URI)
+        return self._client
+
+    def _get_experiment_id(self) -> str:
+        if self._experiment_id is None:
+            experiment = self.client.get_experiment_by_name(MLFLOW_CHAT_EXPERIMENT)
+            if experiment is None:
+                self._experiment_id = self.client.create_experiment(MLFLOW_CHAT_EXPERIMENT)
+                logger.debug(f"Created MLflow experiment {MLFLOW_CHAT_EXPERIMENT}")
+            else:
+                self._experiment_id = experiment.experiment_id
+        return self._experiment_id
+
+    def _next_batch(self) -> List[TrackingEvent]:
+        batch = list()
+        deadline = time.monotonic() + MLFLOW_FLUSH_INTERVAL
+        while len(batch) < MLFLOW_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or (self._stopping.is_set() and self._queue.empty()):
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(timeout, 0.5)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _run(self) -> None:
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[TrackingEvent]) -> None:
+        started = time.perf_counter()
+        try:
+            experiment_id = self._get_experiment_id()
+        except Exception as e:
+            # Tracking is best effort; the batch is dropped rather than retried
+            metrics.inc("tracking.failed", len(batch))
+            logger.warning(f"Failed to write {len(batch)} chat turns to MLflow: {str(e)}")
+            return
+        written = 0
+        try:
+            for event in batch:
+                written += self._write_event(experiment_id, event)
+        finally:
+            metrics.inc("tracking.written", written)
+            if written < len(batch):
+                metrics.inc("tracking.failed", len(batch) - written)
+            metrics.observe("tracking.batch_seconds", time.perf_counter() - started)
+
+    def _write_event(self, experiment_id: str, event: TrackingEvent) -> bool:
+        """
+        Record one chat turn as its own run
+
+        Each turn keeps its own run so that its tags and params (user, question, backend) stay
+        searchable in the MLflow UI. That costs three calls per turn, made on this thread only.
+
+        Returns:
+            bool: Whether the turn was written; a failing turn does not drop the rest of the batch
+        """
+        try:
+            run = self.client.create_run(experiment_id, start_time=event.timestamp,
+                                         tags={key: str(value) for key, value in event.tags.items()})
+            run_id = run.info.run_id
+            self.client.log_batch(
+                run_id,
+                metrics=[Metric(key, value, event.timestamp, 0) for key, value in event.values.items()],
+                params=[Param(key, str(value)[:6000]) for key, value in event.params.items()]
+            )
+            self.client.set_terminated(run_id, end_time=event.timestamp)
+        except Exception as e:
+            logger.warning(f"Failed to write a chat turn to MLflow: {str(e)}")
+            return False
+        return True
+
+tracking = TrackingWriter()
@@ -33,7 +33,8 @@ export const ROUTES = {
     CAPTCHA: `${BASE_URL}/api/auth/captcha`
   },
   CHAT: {
-    CHAT: `${BASE_URL}/chat/chat`
+    CHAT: `${BASE_URL}/chat/chat`,
+    STREAM: `${BASE_URL}/chat/stream`
   }
 }
 
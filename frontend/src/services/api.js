@@ -8,6 +8,23 @@ export const initializeApiService = (routerInstance) => {
   router = routerInstance;
 }
 
+// Attach the session token issued by /auth/verify to every request
+axios.interceptors.request.use((config) => {
+  const sessionToken = localStorage.getItem('session_token')
+  if (sessionToken) {
+    config.headers = config.headers || {}
+    config.headers.Authorization = `Bearer ${sessionToken}`
+  }
+  return config
+})
+
+// Keep the refreshed session token returned when an assessment starts
+const storeSessionToken = (data) => {
+  if (data?.session_token) {
+    localStorage.setItem('session_token', data.session_token)
+  }
+}
+
 const TIME_EXPIRED_STATUS = 440 // Special status code for time expired
 
 const handleError = (error) => {
@@ -59,6 +76,7 @@ export const mcqService = {
         user_id: userId,
         current_epoch: currentEpoch
       })
+      storeSessionToken(response.data)
       return response.data
     } catch (error) {
       handleError(error)
@@ -167,10 +185,11 @@ export const codingService = {
       localStorage.setItem('assessment_start_time', startTime.toString())
       
       // First call the start assessment API
-      await axios.post(ROUTES.CODING.START_ASSESSMENT, {
+      const startResponse = await axios.post(ROUTES.CODING.START_ASSESSMENT, {
         ...prepareNextTaskData(),
         start_epoch: startTime
       })
+      storeSessionToken(startResponse.data)
 
       // Then call next-task API to get the first task
       const formData = new FormData()